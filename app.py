@@ -1,57 +1,304 @@
 import flet as ft
+import base64
+import hashlib
+import importlib.util
 import json
+import queue
+import socket
 import requests
 import os
+import sys
 import time
 import threading
 import websocket
+import cProfile
+import pstats
+import tracemalloc
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from urllib.parse import urlparse
 from pypresence import Presence
-from playsound3 import playsound
+from notifications import NOTIFICATIONS
+from settings_store import SettingsStore, TokenCache, token_expired
+from token_inventory import jwt_claims, read_leveldb_token
 
 # Discord RPC Configuration
 CLIENT_ID = "1445174302323376219" 
 RPC = None
 RPC_UPDATE_INTERVAL = 1
 
+# Local data directory
+APP_DATA_DIR = os.path.join(os.getenv('APPDATA') or str(Path.home()), 'krunker_external_queue')
+
+# Profiling Configuration (KRUNKER_PROFILE=1 enables it at startup)
+PROFILE_ENV = os.getenv('KRUNKER_PROFILE', '') not in ('', '0')
+PROFILE_DIR = os.getenv('KRUNKER_PROFILE_DIR') or os.path.join(APP_DATA_DIR, 'profiles')
+PROFILE_SAMPLE_INTERVAL = 5
+PROFILE_TRACEMALLOC_INTERVAL = 60
+PROFILE_TRACEMALLOC_TOP = 15
+PROFILE_CAPTURE_SECONDS = 10
+USAGE_SAMPLE_INTERVAL = 2
+
+# Python 3.12+ cProfile (sys.monitoring) covers every thread and can be switched off from any thread
+PROFILE_GLOBAL = sys.version_info >= (3, 12)
+
+# Settings Configuration
+SETTINGS_PATH = os.path.join(APP_DATA_DIR, 'settings.json')
+TOKEN_PATH = os.path.join(APP_DATA_DIR, 'token')
+
+# Startup benchmark hooks (set by startup_benchmark.py)
+STARTUP_PROBE = os.getenv('KRUNKER_STARTUP_PROBE', '') not in ('', '0')
+LAUNCH_TIME = float(os.getenv('KRUNKER_LAUNCH_TIME') or 0)
+
+# Control API Configuration (localhost only)
+CONTROL_HOST = "127.0.0.1"
+CONTROL_PORT = int(os.getenv('KRUNKER_CONTROL_PORT', '8765'))
+CONTROL_BUFFER_SIZE = 64
+CONTROL_KEEPALIVE = 15
+CONTROL_HEADER = "X-Krunker-Control"
+LOCAL_HOSTNAMES = ('localhost', '127.0.0.1')
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# Queue Session Configuration
+MATCHMAKING_URL = "wss://gamefrontend.svc.krunker.io/v1/matchmaking/queue"
+REGION_CODES = {
+    'EU': 'eu',
+    'NA': 'na',
+    'ASIA': 'as'
+}
+PRESET_HOTKEYS = 9
+# Ctrl+Alt is what Windows reports for AltGr (@, #, { on AZERTY/QWERTZ), so it isn't the default
+HOTKEY_MODIFIERS = {
+    'ctrl+shift': "Ctrl+Shift",
+    'ctrl+alt': "Ctrl+Alt (AltGr on AZERTY/QWERTZ)",
+    'alt+shift': "Alt+Shift",
+    'off': "Off",
+}
+DEFAULT_HOTKEY_MODIFIERS = 'ctrl+shift'
+RECONNECT_ATTEMPTS = 3
+RECONNECT_DELAY = 2
+
+# ==================== CLIENTS ====================
+
+class ClientRegistry:
+    """Known clients indexed by their leveldb path (keeps insertion order)"""
+    def __init__(self):
+        self._clients = {}
+
+    def add(self, name, path, default=False):
+        """Adds a client, returns None if the path is already registered"""
+        if path in self._clients:
+            return None
+        client = {'name': name, 'path': path, 'default': default, 'status': None}
+        self._clients[path] = client
+        return client
+
+    def remove(self, path):
+        return self._clients.pop(path, None)
+
+    def get(self, path):
+        return self._clients.get(path)
+
+    def custom(self):
+        """Custom clients in their persisted form"""
+        return [{'name': c['name'], 'path': c['path']} for c in self._clients.values() if not c['default']]
+
+    def __contains__(self, path):
+        return path in self._clients
+
+    def __iter__(self):
+        return iter(list(self._clients.values()))
+
+    def __len__(self):
+        return len(self._clients)
+
+class ClientScanner:
+    """Background worker probing the token status of clients, one path at a time"""
+    def __init__(self, scan, on_result):
+        self.scan = scan
+        self.on_result = on_result
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, path):
+        """Queues a scan (ignored if the path is already pending)"""
+        with self._lock:
+            if path in self._pending:
+                return
+            self._pending.add(path)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="client-scanner", daemon=True)
+                self._thread.start()
+        self._queue.put(path)
+
+    def _run(self):
+        while True:
+            path = self._queue.get()
+            with self._lock:
+                self._pending.discard(path)
+
+            started = time.perf_counter()
+            token = self.scan(path)
+            status = {
+                'token': bool(token),
+                'exp': jwt_claims(token).get('exp') if token else None,
+                'expired': bool(token) and token_expired(token, margin=0),
+                'scanned_at': time.time(),
+                'scan_ms': (time.perf_counter() - started) * 1000,
+            }
+            try:
+                self.on_result(path, status)
+            except Exception as e:
+                print(f"[CLIENTS] Error updating status: {e}")
+
+# ==================== QUEUE SESSION ====================
+
+IDLE = 'IDLE'
+CONNECTING = 'CONNECTING'
+QUEUED = 'QUEUED'
+MATCHED = 'MATCHED'
+ERROR = 'ERROR'
+RECONNECTING = 'RECONNECTING'
+
+QUEUE_TRANSITIONS = {
+    IDLE: {CONNECTING},
+    CONNECTING: {QUEUED, ERROR, IDLE},
+    QUEUED: {MATCHED, ERROR, RECONNECTING, IDLE},
+    RECONNECTING: {QUEUED, ERROR, IDLE},
+    MATCHED: {CONNECTING, IDLE},
+    ERROR: {CONNECTING, IDLE},
+}
+
+QueueSnapshot = namedtuple('QueueSnapshot', [
+    'state', 'session_id', 'time', 'start_time', 'regions', 'maps', 'preset',
+    'match', 'error', 'reason', 'connected',
+])
+
+def build_queue_query(regions, maps):
+    """Builds the matchmaking query string (without the token) for a region/map selection"""
+    regions_str = ','.join([REGION_CODES[r] for r in regions])
+    maps_str = ','.join(maps)
+    return f"maps={maps_str}&regions={regions_str}"
+
+class QueueSession:
+    """Queue state machine: Idle -> Connecting -> Queued -> Matched/Error/Reconnecting.
+
+    transition() is the only writer of the queue state. Every change produces an immutable
+    snapshot, is appended to `log` and handed to the listeners (UI, timer, presence, events).
+    Calls tagged with an old session_id (stale WebSocket callbacks) are ignored.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.snapshot = QueueSnapshot(IDLE, 0, time.time(), None, [], [], None, None, None, None, False)
+        self.log = []
+
+    def add_listener(self, listener):
+        """Registers listener(previous, snapshot), called after each transition"""
+        self._listeners.append(listener)
+
+    def begin(self, regions, maps, preset=None):
+        """Starts a new queue session, returns its id (None if already in one)"""
+        snapshot = self.transition(CONNECTING, new_session=True, start_time=None, regions=list(regions),
+                                   maps=list(maps), preset=preset, match=None, error=None, reason=None,
+                                   connected=False)
+        return snapshot.session_id if snapshot else None
+
+    def time_by_preset(self):
+        """Seconds spent searching (Queued/Reconnecting) per preset, computed from the log"""
+        with self._lock:
+            log = list(self.log)
+
+        totals = {}
+        for entry, following in zip(log, log[1:] + [None]):
+            if entry['to'] in (QUEUED, RECONNECTING):
+                end = following['time'] if following else time.time()
+                preset = entry['preset'] or 'custom'
+                totals[preset] = totals.get(preset, 0) + end - entry['time']
+        return {preset: round(seconds, 1) for preset, seconds in totals.items()}
+
+    def transition(self, state, session_id=None, new_session=False, **changes):
+        """Moves to `state` if allowed, returns the new snapshot or None if rejected.
+
+        Transitioning to the current state updates its fields (e.g. connected) in place.
+        """
+        with self._lock:
+            previous = self.snapshot
+            if session_id is not None and session_id != previous.session_id:
+                return None
+            if state == previous.state:
+                if new_session or not changes:
+                    return None
+            elif state not in QUEUE_TRANSITIONS[previous.state]:
+                return None
+
+            if new_session:
+                changes['session_id'] = previous.session_id + 1
+            snapshot = previous._replace(state=state, time=time.time(), **changes)
+            self.snapshot = snapshot
+            self.log.append({
+                'time': snapshot.time,
+                'session_id': snapshot.session_id,
+                'from': previous.state,
+                'to': state,
+                'preset': snapshot.preset,
+                'reason': snapshot.reason,
+                'error': snapshot.error,
+            })
+
+        if state != previous.state:
+            print(f"[STATE] {previous.state} -> {state}")
+        for listener in self._listeners:
+            try:
+                listener(previous, snapshot)
+            except Exception as e:
+                print(f"[STATE] Listener error: {e}")
+        return snapshot
+
 class KrunkerQueue:
     def __init__(self):
         self.token = None
         self.ws = None
-        self.start_time = None
-        self.is_queued = False
+        self.session = QueueSession()
+        self._ws_lock = threading.Lock()
+        self._ws_session = None
         self.selected_regions = []
         self.selected_maps = []
-        self.custom_clients = []
+        self.clients = ClientRegistry()
+
+    @property
+    def is_queued(self):
+        return self.session.snapshot.state in (QUEUED, RECONNECTING)
+
+    @property
+    def start_time(self):
+        return self.session.snapshot.start_time
+
+    def attach_ws(self, ws, session_id):
+        """Makes `ws` the socket of `session_id`, returns False if that session has ended"""
+        with self._ws_lock:
+            snapshot = self.session.snapshot
+            if snapshot.session_id != session_id or snapshot.state not in (CONNECTING, RECONNECTING):
+                return False
+            self.ws, self._ws_session = ws, session_id
+            return True
+
+    def close_ws(self, session_id):
+        """Closes the socket of `session_id` (a newer session's socket is left alone)"""
+        with self._ws_lock:
+            ws = self.ws
+            if ws is None or self._ws_session != session_id:
+                return False
+            self.ws = self._ws_session = None
+        ws.close()
+        return True
 
     def get_token_from_leveldb(self, path):
         """Retrieves the token from a client's localStorage"""
-        try:
-            if not os.path.exists(path):
-                return None
-
-            for file in os.listdir(path):
-                if file.endswith(('.ldb', '.log')):
-                    filepath = os.path.join(path, file)
-                    try:
-                        with open(filepath, 'rb') as f:
-                            content = f.read()
-                            if b'__FRVR_auth_access_token' in content:
-                                start = content.find(b'eyJ')
-                                if start != -1:
-                                    end = content.find(b'\x00', start)
-                                    if end == -1:
-                                        end = start + 1000
-                                    token = content[start:end].decode('utf-8', errors='ignore')
-                                    token = token.split('\x00')[0].split('"')[0]
-                                    if token.startswith('eyJ'):
-                                        return token
-                    except:
-                        continue
-            return None
-        except Exception as e:
-            print(f"Error reading: {e}")
-            return None
+        return read_leveldb_token(path)
 
     def login_with_credentials(self, username, password):
         """Login with username/password"""
@@ -102,6 +349,606 @@ class KrunkerQueue:
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+# ==================== PROFILING ====================
+
+def thread_cpu_time(thread):
+    """Returns the CPU time (in seconds) used by a thread, or None if unavailable"""
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            from ctypes import wintypes
+
+            kernel32 = ctypes.windll.kernel32
+            kernel32.OpenThread.restype = wintypes.HANDLE
+            handle = kernel32.OpenThread(0x0800, False, thread.native_id)  # THREAD_QUERY_LIMITED_INFORMATION
+            if not handle:
+                return None
+            try:
+                creation, exit_, kernel, user = (wintypes.FILETIME() for _ in range(4))
+                if not kernel32.GetThreadTimes(handle, ctypes.byref(creation), ctypes.byref(exit_),
+                                               ctypes.byref(kernel), ctypes.byref(user)):
+                    return None
+                ticks = sum((t.dwHighDateTime << 32) | t.dwLowDateTime for t in (kernel, user))
+                return ticks / 10_000_000
+            finally:
+                kernel32.CloseHandle(handle)
+
+        return time.clock_gettime(time.pthread_getcpuclockid(thread.ident))
+    except Exception:
+        return None
+
+class _StatsSnapshot:
+    """Minimal profile-like object accepted by pstats.Stats"""
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+def _diff_stats(after, before):
+    """Returns the cProfile stats accumulated between two snapshots"""
+    window = {}
+    for func, (cc, nc, tt, ct, callers) in after.items():
+        if func in before:
+            b_cc, b_nc, b_tt, b_ct, b_callers = before[func]
+            if nc == b_nc:
+                continue
+            cc, nc, tt, ct = cc - b_cc, nc - b_nc, tt - b_tt, ct - b_ct
+            callers = {
+                caller: tuple(a - b for a, b in zip(values, b_callers.get(caller, (0, 0, 0, 0))))
+                for caller, values in callers.items()
+            }
+            callers = {caller: values for caller, values in callers.items() if values[0]}
+        window[func] = (cc, nc, tt, ct, callers)
+    return window
+
+class Profiler:
+    """Opt-in profiling mode: per-thread CPU sampling, cProfile windows and tracemalloc diffs.
+
+    Nothing is hooked or started until start() is called, so the disabled mode costs nothing.
+    Before Python 3.12 cProfile is per-thread and can only be disabled by the thread running it,
+    so threads started while profiling was on stay profiled until they exit (see
+    `needs_restart`); restart the app to get back to zero cost.
+    """
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.enabled = False
+        self.capturing = False
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._profiles = {}
+        self._last_cpu = {}
+        self._last_snapshot = None
+        self.needs_restart = False
+
+    def start(self):
+        """Enables profiling for the current thread and every thread started afterwards"""
+        if self.enabled:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.enabled = True
+        self._stop.clear()
+        tracemalloc.start()
+
+        # The sampler is started before the hook so it doesn't profile itself
+        threading.Thread(target=self._sampler_loop, name="profiler-sampler", daemon=True).start()
+        if PROFILE_GLOBAL:
+            self._install(None)
+        else:
+            threading.setprofile(self._thread_hook)
+            self._install(threading.current_thread())
+        print(f"[PROFILE] Enabled, writing to {self.output_dir}")
+
+    def stop(self):
+        """Disables profiling, returns True if some threads are still profiled (Python < 3.12)"""
+        if not self.enabled:
+            return False
+        self.enabled = False
+        self._stop.set()
+        threading.setprofile(None)
+        with self._lock:
+            profiles = list(self._profiles.items())
+            self._profiles.clear()
+
+        current = threading.current_thread()
+        for thread, profile in profiles:
+            profile.disable()
+            if thread is not None and thread is not current and thread.is_alive():
+                self.needs_restart = True
+        tracemalloc.stop()
+        self._last_snapshot = None
+        self._last_cpu.clear()
+        if self.needs_restart:
+            print("[PROFILE] Disabled (threads started while enabled stay profiled until restart)")
+        else:
+            print("[PROFILE] Disabled")
+        return self.needs_restart
+
+    def _thread_hook(self, frame, event, arg):
+        """First profile event of a new thread: swap the hook for a per-thread cProfile"""
+        sys.setprofile(None)
+        if self.enabled:
+            self._install(threading.current_thread())
+
+    def _install(self, thread):
+        """Enables a cProfile for `thread` (None: one profile covering every thread)"""
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles[thread] = profile
+        profile.enable()
+
+    def _prune(self):
+        """Forgets the profiles of threads that have exited"""
+        with self._lock:
+            for thread in [t for t in self._profiles if t is not None and not t.is_alive()]:
+                del self._profiles[thread]
+
+    def _snapshot_stats(self):
+        self._prune()
+        with self._lock:
+            profiles = list(self._profiles.items())
+        result = {}
+        for thread, profile in profiles:
+            profile.snapshot_stats()
+            result[thread] = dict(profile.stats)
+        return result
+
+    def capture(self, seconds=PROFILE_CAPTURE_SECONDS):
+        """Captures a cProfile window across all profiled threads, returns the dump path"""
+        if not self.enabled or self.capturing:
+            return None
+
+        self.capturing = True
+        try:
+            print(f"[PROFILE] Capturing cProfile for {seconds}s...")
+            before = self._snapshot_stats()
+            time.sleep(seconds)
+            after = self._snapshot_stats()
+        finally:
+            self.capturing = False
+
+        stats = None
+        per_thread = []
+        for thread, thread_stats in after.items():
+            if thread is threading.current_thread():
+                continue
+            window = _diff_stats(thread_stats, before.get(thread, {}))
+            if not window:
+                continue
+            per_thread.append((thread.name if thread else "all threads", sum(entry[2] for entry in window.values())))
+            if stats is None:
+                stats = pstats.Stats(_StatsSnapshot(window))
+            else:
+                stats.add(_StatsSnapshot(window))
+
+        if stats is None:
+            print("[PROFILE] Nothing recorded during the capture window")
+            return None
+
+        base = os.path.join(self.output_dir, f"cprofile-{time.strftime('%Y%m%d-%H%M%S')}")
+        stats.dump_stats(base + '.prof')
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            f.write(f"Capture window: {seconds}s\n\nTime spent per thread:\n")
+            for name, total in sorted(per_thread, key=lambda item: item[1], reverse=True):
+                f.write(f"  {name:<30} {total:.4f}s\n")
+            f.write("\n")
+            stats.stream = f
+            stats.sort_stats('cumulative').print_stats(40)
+        print(f"[PROFILE] cProfile saved: {base}.prof")
+        return base + '.prof'
+
+    def sample_threads(self):
+        """Appends the CPU time used by each thread since the last sample"""
+        threads = []
+        last_cpu = {}
+        for thread in threading.enumerate():
+            cpu = thread_cpu_time(thread)
+            if cpu is None:
+                continue
+            last = self._last_cpu.get(thread.ident, 0.0)
+            last_cpu[thread.ident] = cpu
+            threads.append({
+                'name': thread.name,
+                'native_id': thread.native_id,
+                'cpu': round(cpu, 4),
+                'cpu_delta': round(cpu - last, 4),
+            })
+        self._last_cpu = last_cpu
+
+        with open(os.path.join(self.output_dir, 'threads.jsonl'), 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'time': time.time(), 'threads': threads}) + '\n')
+
+    def snapshot_memory(self):
+        """Takes a tracemalloc snapshot and writes the top allocation diffs vs the previous one"""
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        if self._last_snapshot is not None:
+            top = snapshot.compare_to(self._last_snapshot, 'lineno')[:PROFILE_TRACEMALLOC_TOP]
+        else:
+            top = snapshot.statistics('lineno')[:PROFILE_TRACEMALLOC_TOP]
+        self._last_snapshot = snapshot
+
+        path = os.path.join(self.output_dir, f"tracemalloc-{time.strftime('%Y%m%d-%H%M%S')}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            for stat in top:
+                f.write(f"{stat}\n")
+
+    def _sampler_loop(self):
+        next_snapshot = time.time()
+        while not self._stop.wait(PROFILE_SAMPLE_INTERVAL):
+            try:
+                self._prune()
+                self.sample_threads()
+                if time.time() >= next_snapshot:
+                    self.snapshot_memory()
+                    next_snapshot = time.time() + PROFILE_TRACEMALLOC_INTERVAL
+            except Exception as e:
+                print(f"[PROFILE] Sampler error: {e}")
+
+PROFILER = Profiler(PROFILE_DIR)
+
+def process_usage():
+    """Returns (rss_bytes, cpu_seconds) of the app.
+
+    With `psutil` installed the UI client subprocess is included; otherwise only this process
+    is measured (rss is None if it can't be read).
+    """
+    try:
+        import psutil
+        process = psutil.Process()
+        rss = cpu = 0
+        for proc in [process] + process.children(recursive=True):
+            try:
+                rss += proc.memory_info().rss
+                times = proc.cpu_times()
+                cpu += times.user + times.system
+            except psutil.Error:
+                continue
+        return rss, cpu
+    except ImportError:
+        pass
+
+    rss = None
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+                    (name, ctypes.c_size_t) for name in (
+                        'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                        'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                rss = counters.WorkingSetSize
+        else:
+            with open('/proc/self/statm') as f:
+                rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except Exception:
+        pass
+    return rss, time.process_time()
+
+class UsageMeter:
+    """Measures average CPU and resident memory per UI mode (full window vs background)
+
+    RSS is sampled every `interval` seconds by a daemon thread so each span reports its
+    average and peak, not just the value at the moment the mode changes. Background mode frees
+    the controls in the Flet client process, so the numbers only mean something with `psutil`
+    (which includes it); without it only this Python process is measured.
+    """
+    def __init__(self, interval=USAGE_SAMPLE_INTERVAL):
+        self.interval = interval
+        if importlib.util.find_spec('psutil'):
+            self.scope = 'app+client'
+        else:
+            print("[USAGE] psutil not installed, measuring the Python process only (not the UI client)")
+            self.scope = 'python'
+        self.mode = None
+        self.history = []
+        self._since = None
+        self._cpu = None
+        self._samples = []
+        self._lock = threading.Lock()
+        self._sampler = None
+
+    def _sample_loop(self):
+        while True:
+            time.sleep(self.interval)
+            rss, _ = process_usage()
+            if rss:
+                with self._lock:
+                    self._samples.append(rss)
+
+    def mark(self, mode):
+        """Closes the current mode's span (and logs it), then starts measuring `mode`"""
+        now = time.perf_counter()
+        rss, cpu = process_usage()
+        with self._lock:
+            samples = self._samples + ([rss] if rss else [])
+            self._samples = [rss] if rss else []
+        if self.mode is not None and now > self._since:
+            span = {
+                'mode': self.mode,
+                'seconds': round(now - self._since, 1),
+                'cpu_percent': round((cpu - self._cpu) / (now - self._since) * 100, 2),
+                'rss_avg_mb': round(sum(samples) / len(samples) / 1024 / 1024, 1) if samples else None,
+                'rss_peak_mb': round(max(samples) / 1024 / 1024, 1) if samples else None,
+                'rss_samples': len(samples),
+                'scope': self.scope,
+            }
+            self.history.append(span)
+            print(f"[USAGE] {span['mode']}: {span['cpu_percent']}% CPU, {span['rss_avg_mb']} MB RSS avg "
+                  f"({span['rss_peak_mb']} MB peak, {span['rss_samples']} samples) over {span['seconds']}s [{span['scope']}]")
+        self.mode = mode
+        self._since = now
+        self._cpu = cpu
+        if self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample_loop, name="usage-sampler", daemon=True)
+            self._sampler.start()
+
+# ==================== CONTROL API ====================
+
+class _Subscriber:
+    """An /events client with its own bounded buffer"""
+    def __init__(self, connection, size):
+        self.connection = connection
+        self.queue = queue.Queue(maxsize=size)
+        self.dropped = False
+
+class EventHub:
+    """Fans events out to subscribers without ever blocking the publisher.
+
+    Each event is serialized once; a subscriber whose buffer is full is dropped and its
+    socket shut down so a stuck overlay can't stall the matchmaking thread.
+    """
+    def __init__(self, buffer_size=CONTROL_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def subscribe(self, connection):
+        subscriber = _Subscriber(connection, self.buffer_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event_type, **payload):
+        """Queues an event for every subscriber (no-op without subscribers)"""
+        if not self._subscribers:
+            return
+        message = json.dumps({'type': event_type, 'time': time.time(), **payload})
+
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(message)
+            except queue.Full:
+                self._drop(subscriber)
+
+    def _drop(self, subscriber):
+        print("[CONTROL] Dropping slow /events subscriber")
+        subscriber.dropped = True
+        self.unsubscribe(subscriber)
+        try:
+            subscriber.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+EVENTS = EventHub()
+
+def _ws_frame(payload, opcode=0x1):
+    """Builds an unmasked, unfragmented server-to-client WebSocket frame"""
+    length = len(payload)
+    if length < 126:
+        header = bytes([0x80 | opcode, length])
+    elif length < 65536:
+        header = bytes([0x80 | opcode, 126]) + length.to_bytes(2, 'big')
+    else:
+        header = bytes([0x80 | opcode, 127]) + length.to_bytes(8, 'big')
+    return header + payload
+
+def normalize_origin(origin):
+    """Returns `scheme://host[:port]` in lowercase, or None if `origin` isn't one"""
+    parsed = urlparse(origin.strip().lower())
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        return None
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+class _ControlHandler(BaseHTTPRequestHandler):
+    """Routes for the local control API"""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, code, data, cors=False):
+        """Sends a JSON response (only GETs from allowed origins are readable cross-origin)"""
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if cors:
+            self._send_cors()
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_cors(self):
+        """Lets the requesting page read the response (callers have checked _allowed_origin)"""
+        origin = self.headers.get('Origin')
+        if origin:
+            self.send_header('Access-Control-Allow-Origin', origin)
+            self.send_header('Vary', 'Origin')
+
+    def _reject(self, code, error):
+        self.close_connection = True
+        self._send_json(code, {'success': False, 'error': error})
+
+    def _local_host(self):
+        """Checks the Host header so DNS-rebound pages can't reach the API"""
+        host = self.headers.get('Host', '')
+        hostname = urlparse(f"//{host}").hostname
+        return hostname in LOCAL_HOSTNAMES
+
+    def _allowed_origin(self):
+        """Blocks other websites open in the browser (any page can fetch or open a WebSocket to localhost).
+
+        Requests without an Origin (scripts, stream decks) are allowed; a browser Origin must be
+        local or in the allowlist set in the Settings tab (`null`, sent by sandboxed iframes and
+        data: pages, is rejected).
+        """
+        origin = self.headers.get('Origin')
+        if origin is None:
+            return True
+        return urlparse(origin).hostname in LOCAL_HOSTNAMES or normalize_origin(origin) in self.server.control.allowed_origins
+
+    def _trusted_post(self):
+        """Blocks cross-site browser requests (any page can send a simple POST to localhost).
+
+        A JSON Content-Type or the X-Krunker-Control header can't be sent cross-site without a
+        CORS preflight, which this server never answers.
+        """
+        if not self._allowed_origin():
+            return False
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        return content_type == 'application/json' or CONTROL_HEADER in self.headers
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        control = self.server.control
+        if not self._local_host():
+            self._reject(403, 'Forbidden host')
+            return
+        if not self._allowed_origin():
+            self._reject(403, 'Forbidden origin (add it to the allowed origins in the Settings tab)')
+            return
+        if path == '/status':
+            self._send_json(200, control.get_status(), cors=True)
+        elif path == '/events':
+            self._stream_events()
+        else:
+            self._send_json(404, {'success': False, 'error': 'Not found'}, cors=True)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        control = self.server.control
+        if not self._local_host():
+            self._reject(403, 'Forbidden host')
+            return
+        if not self._trusted_post():
+            self._reject(403, f'Send Content-Type: application/json or {CONTROL_HEADER} from a local origin')
+            return
+
+        # Drain any request body so the connection stays usable
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+
+        if path == '/queue':
+            result = control.on_queue(body)
+        elif path == '/leave':
+            result = control.on_leave(body)
+        else:
+            self._send_json(404, {'success': False, 'error': 'Not found'})
+            return
+
+        self._send_json(202 if result.get('success') else 409, {**result, 'status': control.get_status()})
+
+    def _stream_events(self):
+        """Streams events over WebSocket (Upgrade request) or Server-Sent Events"""
+        control = self.server.control
+        websocket_mode = self.headers.get('Upgrade', '').lower() == 'websocket'
+
+        if websocket_mode:
+            key = self.headers.get('Sec-WebSocket-Key', '')
+            accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+            self.send_response(101, 'Switching Protocols')
+            self.send_header('Upgrade', 'websocket')
+            self.send_header('Connection', 'Upgrade')
+            self.send_header('Sec-WebSocket-Accept', accept)
+            self.end_headers()
+            send = lambda message: self.wfile.write(_ws_frame(message.encode('utf-8')))
+            keepalive = lambda: self.wfile.write(_ws_frame(b'', opcode=0x9))
+        else:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self._send_cors()
+            self.end_headers()
+            send = lambda message: self.wfile.write(f"data: {message}\n\n".encode('utf-8'))
+            keepalive = lambda: self.wfile.write(b": keepalive\n\n")
+
+        subscriber = control.events.subscribe(self.connection)
+        self.close_connection = True
+        try:
+            send(json.dumps({'type': 'STATUS', 'time': time.time(), **control.get_status()}))
+            self.wfile.flush()
+            while not subscriber.dropped and control.running:
+                try:
+                    message = subscriber.queue.get(timeout=CONTROL_KEEPALIVE)
+                    send(message)
+                except queue.Empty:
+                    keepalive()
+                self.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            control.events.unsubscribe(subscriber)
+
+class ControlServer:
+    """Localhost HTTP + WebSocket server to drive and observe the queue
+
+    POST /queue, POST /leave, GET /status and GET /events (WebSocket or SSE). Browser pages
+    are only served from local origins and `allowed_origins` (normalized, see normalize_origin).
+    """
+    def __init__(self, events, on_queue, on_leave, get_status, host=CONTROL_HOST, port=CONTROL_PORT,
+                 allowed_origins=()):
+        self.events = events
+        self.on_queue = on_queue
+        self.on_leave = on_leave
+        self.get_status = get_status
+        self.allowed_origins = set(allowed_origins)
+        self.host = host
+        self.port = port
+        self.running = False
+        self._server = None
+
+    def start(self):
+        """Starts serving in a background thread, returns False if the port is unavailable"""
+        if self.running:
+            return True
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), _ControlHandler)
+        except OSError as e:
+            print(f"[CONTROL] Cannot listen on {self.host}:{self.port}: {e}")
+            return False
+        self._server.daemon_threads = True
+        self._server.control = self
+        self.running = True
+        threading.Thread(target=self._server.serve_forever, name="control-api", daemon=True).start()
+        print(f"[CONTROL] Listening on http://{self.host}:{self.port}")
+        return True
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        print("[CONTROL] Stopped")
+
 def update_presence():
     """Updates the Discord RPC based on the application state"""
     global RPC, krunker
@@ -164,6 +1011,7 @@ def presence_update_thread():
 
 def main(page: ft.Page):
     global RPC, krunker
+    startup_time = time.perf_counter()
 
     page.title = "Krunker External Queue"
     page.theme_mode = ft.ThemeMode.DARK
@@ -179,7 +1027,7 @@ def main(page: ft.Page):
         print("Rich Presence connected!")
 
         # Start the RPC update thread
-        threading.Thread(target=presence_update_thread, daemon=True).start()
+        threading.Thread(target=presence_update_thread, name="rpc-presence", daemon=True).start()
     except Exception as e:
         print(f"Error connecting to RPC: {e}")
         RPC = None
@@ -188,16 +1036,30 @@ def main(page: ft.Page):
     version_text = ft.Text("v1.0.0", size=12, color=ft.Colors.GREY_500, text_align=ft.TextAlign.RIGHT)
 
     krunker = KrunkerQueue()
+
+    # Load persisted settings (single small read)
+    settings = SettingsStore(SETTINGS_PATH)
+    settings.load()
+    token_cache = TokenCache(settings, TOKEN_PATH)
+    krunker.token = token_cache.load()
+    settings_time = time.perf_counter() - startup_time
+
+    notification_config = settings.get('notifications', {'sound': {}})
+    NOTIFICATIONS.configure(notification_config)
+
     ws_task = None
     challenge_id = None
-    timer_thread = None
-    stop_timer = False
 
     default_paths = [
         os.path.join(os.getenv('APPDATA'), 'crankshaft', 'Local Storage', 'leveldb'),
         os.path.join(os.getenv('APPDATA'), 'pc7', 'Local Storage', 'leveldb'),
     ]
 
+    krunker.clients.add("Crankshaft", default_paths[0], default=True)
+    krunker.clients.add("PC7", default_paths[1], default=True)
+    for client in settings.get('custom_clients', []):
+        krunker.clients.add(client['name'], client['path'])
+
     regions_map = {
         'EU': ft.Checkbox(label="EU", value=True),
         'NA': ft.Checkbox(label="NA", value=False),
@@ -214,6 +1076,30 @@ def main(page: ft.Page):
         'eterno_sim': ft.Checkbox(label="Eterno (used for tests)", value=False),
     }
 
+    # Restore the saved region/map choices
+    saved_regions = settings.get('regions')
+    if saved_regions is not None:
+        for code, checkbox in regions_map.items():
+            checkbox.value = code in saved_regions
+    saved_maps = settings.get('maps')
+    if saved_maps is not None:
+        for map_name, checkbox in maps_map.items():
+            checkbox.value = map_name in saved_maps
+
+    def on_selection_change(e):
+        """Saves the region/map choices"""
+        settings.set('regions', [k for k, v in regions_map.items() if v.value])
+        settings.set('maps', [k for k, v in maps_map.items() if v.value])
+
+    for checkbox in list(regions_map.values()) + list(maps_map.values()):
+        checkbox.on_change = on_selection_change
+
+    # Queue presets, with their query string computed once when saved
+    presets = {}
+    for preset in settings.get('presets', []):
+        preset['query'] = preset.get('query') or build_queue_query(preset['regions'], preset['maps'])
+        presets[preset['name']] = preset
+
     # ==================== LOGIN PAGE ====================
 
     login_status_text = ft.Text("", size=14, text_align=ft.TextAlign.CENTER)
@@ -255,10 +1141,7 @@ def main(page: ft.Page):
     client_dropdown = ft.Dropdown(
         label="Select Client",
         width=350,
-        options=[
-            ft.dropdown.Option("crankshaft", "Crankshaft"),
-            ft.dropdown.Option("pc7", "PC7"),
-        ],
+        options=[ft.dropdown.Option(client['path'], client['name']) for client in krunker.clients],
         icon=ft.Icons.COMPUTER
     )
 
@@ -271,7 +1154,7 @@ def main(page: ft.Page):
 
     def on_detect_token(e):
         """Detects the token from a client"""
-        client = client_dropdown.value
+        client = krunker.clients.get(client_dropdown.value)
         if not client:
             login_status_text.value = "❌ Select a client first"
             login_status_text.color = ft.Colors.RED
@@ -282,13 +1165,13 @@ def main(page: ft.Page):
         login_status_text.color = ft.Colors.BLUE
         page.update()
 
-        path_index = 0 if client == "crankshaft" else 1
-        token = krunker.get_token_from_leveldb(default_paths[path_index])
+        token = krunker.get_token_from_leveldb(client['path'])
 
         if token:
             krunker.token = token
+            token_cache.save(token)
             print(f"[TOKEN DETECTED]")
-            login_status_text.value = f"✓ Token detected from {client}! You can now go to Queue tab."
+            login_status_text.value = f"✓ Token detected from {client['name']}! You can now go to Queue tab."
             login_status_text.color = ft.Colors.GREEN
 
             # Switch to the Queue tab after 1 second
@@ -298,9 +1181,9 @@ def main(page: ft.Page):
                 page.update()
                 update_presence()
 
-            threading.Thread(target=switch_to_queue, daemon=True).start()
+            threading.Thread(target=switch_to_queue, name="tab-switcher", daemon=True).start()
         else:
-            login_status_text.value = f"❌ Token not found in {client}"
+            login_status_text.value = f"❌ Token not found in {client['name']}"
             login_status_text.color = ft.Colors.RED
 
         page.update()
@@ -323,6 +1206,7 @@ def main(page: ft.Page):
 
         if result.get('success'):
             krunker.token = result['token']
+            token_cache.save(krunker.token)
             print(f"[LOGIN SUCCESS]")
             login_status_text.value = "✓ Login successful! You can now go to Queue tab."
             login_status_text.color = ft.Colors.GREEN
@@ -334,7 +1218,7 @@ def main(page: ft.Page):
                 page.update()
                 update_presence()
 
-            threading.Thread(target=switch_to_queue, daemon=True).start()
+            threading.Thread(target=switch_to_queue, name="tab-switcher", daemon=True).start()
         elif result.get('2fa'):
             challenge_id = result['challenge_id']
             login_status_text.value = "🔐 2FA required - Enter your code below"
@@ -364,6 +1248,7 @@ def main(page: ft.Page):
 
         if result.get('success'):
             krunker.token = result['token']
+            token_cache.save(krunker.token)
             print(f"[2FA SUCCESS]")
             login_status_text.value = "✓ 2FA verified! Login successful. You can now go to Queue tab."
             login_status_text.color = ft.Colors.GREEN
@@ -378,7 +1263,7 @@ def main(page: ft.Page):
                 page.update()
                 update_presence()
 
-            threading.Thread(target=switch_to_queue, daemon=True).start()
+            threading.Thread(target=switch_to_queue, name="tab-switcher", daemon=True).start()
         else:
             login_status_text.value = f"❌ {result.get('error', '2FA failed')}"
             login_status_text.color = ft.Colors.RED
@@ -447,6 +1332,25 @@ def main(page: ft.Page):
         visible=False,
         icon=ft.Icons.STOP
     )
+    background_btn = ft.TextButton(
+        "Background Mode",
+        icon=ft.Icons.MINIMIZE,
+        visible=False
+    )
+
+    # Background mode: the only controls left on the page while queued
+    mini_status_text = ft.Text("", size=14, weight=ft.FontWeight.BOLD)
+    mini_timer_text = ft.Text("", size=20, weight=ft.FontWeight.BOLD)
+    mini_restore_btn = ft.ElevatedButton("Open", icon=ft.Icons.OPEN_IN_FULL)
+    mini_leave_btn = ft.ElevatedButton("Leave", icon=ft.Icons.STOP, bgcolor=ft.Colors.RED, color=ft.Colors.WHITE)
+    mini_view = ft.Container(
+        content=ft.Column([
+            mini_status_text,
+            mini_timer_text,
+            ft.Row([mini_restore_btn, mini_leave_btn], alignment=ft.MainAxisAlignment.CENTER),
+        ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
+        padding=10,
+    )
 
     match_info = ft.Container(
         content=ft.Column([
@@ -460,28 +1364,151 @@ def main(page: ft.Page):
         visible=False,
     )
 
+    # ==================== QUEUE SESSION ====================
+
+    session = krunker.session
+    timer_stop = threading.Event()
+    timer_thread = None
+    background = False
+    window_size = None
+    usage = UsageMeter()
+
+    def render_timer():
+        start_time = krunker.start_time
+        if start_time:
+            elapsed = int(time.time() - start_time)
+            minutes = elapsed // 60
+            seconds = elapsed % 60
+            timer_text.value = f"⏱️ {minutes:02d}:{seconds:02d}"
+
     def update_timer():
-        """Updates the timer"""
-        nonlocal stop_timer
-        while krunker.is_queued and not stop_timer:
-            if krunker.start_time:
-                elapsed = int(time.time() - krunker.start_time)
-                minutes = elapsed // 60
-                seconds = elapsed % 60
-                timer_text.value = f"⏱️ {minutes:02d}:{seconds:02d}"
-                page.update()
-            time.sleep(1)
+        """Updates the timer until the session leaves the queue"""
+        while not timer_stop.wait(1):
+            render_timer()
+            if background:
+                mini_timer_text.value = timer_text.value
+                page.title = f"{timer_text.value} - Krunker External Queue"
+            page.update()
+
+    def render_queue(snapshot):
+        """Derives the whole queue UI from a session snapshot"""
+        state = snapshot.state
+        searching = state in (QUEUED, RECONNECTING)
 
-    def connect_websocket(url):
-        """WebSocket connection with websocket-client"""
-        nonlocal stop_timer, timer_thread
+        if state == IDLE:
+            if snapshot.reason == 'switch':
+                queue_status_text.value = "🔀 Switching preset..."
+                queue_status_text.color = ft.Colors.BLUE
+            else:
+                queue_status_text.value = "Left queue" if snapshot.reason == 'left' else "Not in queue"
+                queue_status_text.color = ft.Colors.ORANGE
+        elif state == CONNECTING:
+            queue_status_text.value = "🔗 Connected..." if snapshot.connected else "⏳ Joining queue..."
+            queue_status_text.color = ft.Colors.BLUE
+        elif state == QUEUED:
+            queue_status_text.value = "🔄 Searching for Match..."
+            queue_status_text.color = ft.Colors.ORANGE
+        elif state == RECONNECTING:
+            queue_status_text.value = "⚠️ Disconnected, reconnecting..."
+            queue_status_text.color = ft.Colors.ORANGE
+        elif state == MATCHED:
+            match = snapshot.match
+            queue_status_text.value = "✅ Match Found!"
+            queue_status_text.color = ft.Colors.GREEN
+            match_info.content.controls[2].value = f"Map: {match['map'].upper()}\nRegion: {match['region'].upper()}\nServer: {match['server']}"
+        elif state == ERROR:
+            queue_status_text.value = f"❌ Error: {snapshot.error}"
+            queue_status_text.color = ft.Colors.RED
+
+        if searching:
+            render_timer()
+        else:
+            timer_text.value = ""
+        match_info.visible = state == MATCHED
+        queue_btn.visible = not searching
+        queue_btn.disabled = state == CONNECTING
+        leave_btn.visible = searching or state == CONNECTING
+        leave_btn.disabled = False
+        background_btn.visible = searching
+        mini_status_text.value = queue_status_text.value
+        mini_timer_text.value = timer_text.value
+        page.update()
+
+    def on_session_change(previous, snapshot):
+        """Applies a transition to the UI, timer, presence and observers"""
+        nonlocal timer_thread
+
+        searching = snapshot.state in (QUEUED, RECONNECTING)
+        if searching and not (timer_thread and timer_thread.is_alive()):
+            timer_stop.clear()
+            timer_thread = threading.Thread(target=update_timer, name="queue-timer", daemon=True)
+            timer_thread.start()
+        elif not searching:
+            timer_stop.set()
+
+        render_queue(snapshot)
+
+        if snapshot.state != previous.state:
+            update_presence()
+            EVENTS.publish('QUEUE_STATUS', status=snapshot.state, reason=snapshot.reason, error=snapshot.error)
+            if snapshot.state == MATCHED:
+                EVENTS.publish('MATCH', **snapshot.match)
+                NOTIFICATIONS.notify('MATCHED', **snapshot.match)
+
+    session.add_listener(on_session_change)
+
+    # ==================== BACKGROUND MODE ====================
+
+    def enter_background(e):
+        """Detaches the tabs so the UI client can free them, keeps a minimized mini view"""
+        nonlocal background, window_size
+        if background or not krunker.is_queued:
+            return
+
+        background = True
+        window_size = (page.window.width, page.window.height)
+        usage.mark('background')
+        print("[BACKGROUND] Entering background mode")
+        page.controls = [mini_view]
+        page.window.width = 320
+        page.window.height = 180
+        page.window.minimized = True
+        page.update()
+
+    def exit_background(e=None):
+        """Rehydrates the full UI from the current session snapshot"""
+        nonlocal background
+        if not background:
+            return
 
+        background = False
+        usage.mark('full')
+        print("[BACKGROUND] Restoring full UI")
+        page.title = "Krunker External Queue"
+        page.controls = [tabs]
+        page.window.width, page.window.height = window_size
+        page.window.minimized = False
+        render_queue(session.snapshot)
+        page.window.to_front()
+
+    def on_background_change(previous, snapshot):
+        """Brings the full window back once the session leaves the queue (match, error, leave)"""
+        if background and snapshot.state not in (QUEUED, RECONNECTING, CONNECTING) and snapshot.reason != 'switch':
+            exit_background()
+
+    session.add_listener(on_background_change)
+    background_btn.on_click = enter_background
+    mini_restore_btn.on_click = exit_background
+
+    def connect_websocket(url, session_id, token):
+        """WebSocket connection with websocket-client (reconnects while queued)"""
         print("=" * 80)
         print("[WEBSOCKET] Initializing connection...")
         # print(f"[WEBSOCKET] URL: {url}")
         print("=" * 80)
 
         def on_message(ws, message):
+            nonlocal attempt
             print(f"[WS] Message received: {message}")
             try:
                 data = json.loads(message)
@@ -491,26 +1518,14 @@ def main(page: ft.Page):
                     print(f"[WS] Queue status: {status}")
 
                     if status == 'QUEUED':
-                        krunker.is_queued = True
-                        krunker.start_time = time.time()
-                        queue_status_text.value = "🔄 Searching for Match..."
-                        queue_status_text.color = ft.Colors.ORANGE
-                        queue_btn.visible = False
-                        leave_btn.visible = True
-                        leave_btn.disabled = False
-                        page.update()
-
                         print("[WS] Waiting for match...")
-
-                        # Start the timer
-                        stop_timer = False
-                        timer_thread = threading.Thread(target=update_timer, daemon=True)
-                        timer_thread.start()
+                        if session.transition(QUEUED, session_id=session_id,
+                                              start_time=krunker.start_time or time.time()):
+                            attempt = 0  # Back in the queue, a later drop gets a fresh set of retries
+                        else:
+                            ws.close()
 
                     elif status == 'MATCHED':
-                        krunker.is_queued = False
-                        stop_timer = True
-
                         assignment = data.get('payload', {}).get('assignment', {})
                         map_name = assignment.get('extensions', {}).get('map', 'Unknown')
                         region = assignment.get('extensions', {}).get('region', 'Unknown').strip()
@@ -521,20 +1536,8 @@ def main(page: ft.Page):
                         print(f"[WS] Region: {region}")
                         print(f"[WS] Server: {connection}")
 
-                        playsound("https://files.catbox.moe/qprgrz.mp3")
-                        queue_status_text.value = "✅ Match Found!"
-                        queue_status_text.color = ft.Colors.GREEN
-                        timer_text.value = ""
-
-                        match_info.content.controls[2].value = f"Map: {map_name.upper()}\nRegion: {region.upper()}\nServer: {connection}"
-                        match_info.visible = True
-
-                        queue_btn.visible = True
-                        queue_btn.disabled = False
-                        leave_btn.visible = False
-
-                        page.update()
-
+                        session.transition(MATCHED, session_id=session_id,
+                                           match={'map': map_name, 'region': region, 'server': connection})
                         ws.close()
 
             except json.JSONDecodeError as e:
@@ -544,45 +1547,104 @@ def main(page: ft.Page):
 
         def on_error(ws, error):
             print(f"[WS] ❌ WebSocket ERROR: {error}")
-            krunker.is_queued = False
-            stop_timer = True
-            queue_status_text.value = f"❌ Error: {error}"
-            queue_status_text.color = ft.Colors.RED
-            queue_btn.visible = True
-            queue_btn.disabled = False
-            leave_btn.visible = False
-            timer_text.value = ""
-            page.update()
+            state = session.snapshot.state
+            if (isinstance(error, websocket.WebSocketBadStatusException) and error.status_code in (401, 403)
+                    and state in (CONNECTING, RECONNECTING)):
+                # The matchmaking handshake refused the token: retrying can't help
+                print("[WS] ❌ Token rejected by matchmaking")
+                if session.transition(ERROR, session_id=session_id, error="Token expired or revoked, please login again"):
+                    forget_token(token, "❌ Your token is no longer valid, please login again")
+            elif state in (QUEUED, RECONNECTING):
+                session.transition(RECONNECTING, session_id=session_id, error=str(error))
+            elif state == CONNECTING:
+                session.transition(ERROR, session_id=session_id, error=str(error))
 
         def on_close(ws, close_status_code, close_msg):
             print(f"[WS] Connection closed")
-            if krunker.is_queued:
-                queue_status_text.value = "⚠️ Disconnected"
-                queue_status_text.color = ft.Colors.ORANGE
-                page.update()
+            session.transition(RECONNECTING, session_id=session_id)
 
         def on_open(ws):
             print(f"[WS] ✅ WebSocket connection established!")
-            queue_status_text.value = "🔗 Connected..."
-            queue_status_text.color = ft.Colors.BLUE
-            page.update()
+            snapshot = session.snapshot
+            if snapshot.session_id != session_id or snapshot.state not in (CONNECTING, RECONNECTING):
+                # The session was left or replaced while connecting
+                ws.close()
+            elif snapshot.state == CONNECTING:
+                session.transition(CONNECTING, session_id=session_id, connected=True)
 
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/88.0.4324.0 Electron/12.0.0-nightly.20201116 Safari/537.36',
             'Origin': 'https://krunker.io'
         }
 
-        krunker.ws = websocket.WebSocketApp(url,
-                                         header=headers,
-                                         on_message=on_message,
-                                         on_error=on_error,
-                                         on_close=on_close,
-                                         on_open=on_open)
+        attempt = 0
+        while attempt <= RECONNECT_ATTEMPTS:
+            if attempt:
+                print(f"[WEBSOCKET] Reconnecting ({attempt}/{RECONNECT_ATTEMPTS})...")
+                time.sleep(RECONNECT_DELAY * attempt)
+
+            ws = websocket.WebSocketApp(url,
+                                        header=headers,
+                                        on_message=on_message,
+                                        on_error=on_error,
+                                        on_close=on_close,
+                                        on_open=on_open)
+            if not krunker.attach_ws(ws, session_id):
+                # Left or replaced during the backoff
+                return
+
+            try:
+                ws.run_forever()
+            except Exception as e:
+                print(f"[WS] Exception: {str(e)}")
+
+            snapshot = session.snapshot
+            if snapshot.session_id != session_id:
+                return
+            if snapshot.state == CONNECTING:
+                session.transition(ERROR, session_id=session_id, error="Connection closed")
+            if snapshot.state != RECONNECTING:
+                krunker.close_ws(session_id)
+                return
+            attempt += 1
+
+        session.transition(ERROR, session_id=session_id, error="Connection lost")
+        krunker.close_ws(session_id)
+
+    def join_queue(regions, maps, query, preset=None):
+        """Opens the matchmaking socket (closing the current one first when switching presets)"""
+        if not krunker.token:
+            queue_status_text.value = "❌ Please login first (go to Login tab)"
+            queue_status_text.color = ft.Colors.RED
+            page.update()
+            return
+
+        if token_expired(krunker.token, margin=0):
+            # Checked before opening the socket: the server would only refuse the connect
+            print("[QUEUE] ❌ Token expired, not joining")
+            queue_status_text.value = "❌ Your token has expired, please login again"
+            queue_status_text.color = ft.Colors.RED
+            forget_token(krunker.token, "❌ Your token has expired, please login again")
+            return
+
+        if session.snapshot.state in (CONNECTING, QUEUED, RECONNECTING):
+            print(f"[QUEUE] Switching to {preset or 'custom selection'}...")
+            switched = session.transition(IDLE, reason='switch')
+            if switched:
+                krunker.close_ws(switched.session_id)
+
+        krunker.selected_regions = list(regions)
+        krunker.selected_maps = list(maps)
+        session_id = session.begin(regions, maps, preset)
+        if session_id is None:
+            return
+
+        ws_url = f"{MATCHMAKING_URL}?token={krunker.token}&{query}"
+        # Start the websocket in a thread
+        ws_thread = threading.Thread(target=connect_websocket, args=(ws_url, session_id, krunker.token),
+                                     name="matchmaking-ws", daemon=True)
+        ws_thread.start()
 
-        try:
-            krunker.ws.run_forever()
-        except Exception as e:
-            print(f"[WS] Exception: {str(e)}")
 
     def on_queue(e):
         """Joins the queue"""
@@ -590,69 +1652,223 @@ def main(page: ft.Page):
             queue_status_text.value = "❌ Please login first (go to Login tab)"
             queue_status_text.color = ft.Colors.RED
             page.update()
-            update_presence()
             return
 
         # Update selected regions and maps
-        krunker.selected_regions = [k for k, v in regions_map.items() if v.value]
-        krunker.selected_maps = [k for k, v in maps_map.items() if v.value]
+        regions = [k for k, v in regions_map.items() if v.value]
+        maps = [k for k, v in maps_map.items() if v.value]
 
-        if not krunker.selected_regions:
+        if not regions:
             queue_status_text.value = "❌ Select at least 1 region"
             queue_status_text.color = ft.Colors.RED
             page.update()
-            update_presence()
             return
 
-        if not krunker.selected_maps:
+        if not maps:
             queue_status_text.value = "❌ Select at least 1 map"
             queue_status_text.color = ft.Colors.RED
             page.update()
-            update_presence()
             return
 
-        queue_btn.disabled = True
-        match_info.visible = False
-        queue_status_text.value = "⏳ Joining queue..."
-        queue_status_text.color = ft.Colors.BLUE
+        join_queue(regions, maps, build_queue_query(regions, maps))
+
+    def join_preset(name):
+        """Joins (or switches to) a preset in one action"""
+        preset = presets.get(name)
+        if preset is None:
+            queue_status_text.value = f"❌ Unknown preset: {name}"
+            queue_status_text.color = ft.Colors.RED
+            page.update()
+            return
+        join_queue(preset['regions'], preset['maps'], preset['query'], preset=name)
+
+    def forget_token(token, message):
+        """Drops a rejected token and sends the user back to the Login tab"""
+        if krunker.token == token:
+            krunker.token = None
+            token_cache.clear()
+
+        login_status_text.value = message
+        login_status_text.color = ft.Colors.RED
+        tabs.selected_index = 0
         page.update()
         update_presence()
-        region_codes = {
-            'EU': 'eu',
-            'NA': 'na',
-            'ASIA': 'as'
-        }
-
-        regions_str = ','.join([region_codes[r] for r in krunker.selected_regions])
-        maps_str = ','.join(krunker.selected_maps)
-        ws_url = f"wss://gamefrontend.svc.krunker.io/v1/matchmaking/queue?token={krunker.token}&maps={maps_str}&regions={regions_str}"
-        # Start the websocket in a thread
-        ws_thread = threading.Thread(target=connect_websocket, args=(ws_url,), daemon=True)
-        ws_thread.start()
 
     def on_leave(e):
         """"Leaves the queue"""
-        nonlocal stop_timer
-
         print("[QUEUE] Leaving queue...")
-        krunker.is_queued = False
-        stop_timer = True
+        left = session.transition(IDLE, reason='left')
 
-        if krunker.ws:
-            krunker.ws.close()
+        if left and krunker.close_ws(left.session_id):
             print("[WEBSOCKET] Closed")
 
-        queue_status_text.value = "Left queue"
-        queue_status_text.color = ft.Colors.ORANGE
-        timer_text.value = ""
-        queue_btn.visible = True
-        queue_btn.disabled = False
-        leave_btn.visible = False
-        page.update()
-        update_presence()
-
     queue_btn.on_click = on_queue
     leave_btn.on_click = on_leave
+    mini_leave_btn.on_click = on_leave
+
+    # ==================== PRESETS ====================
+
+    preset_dropdown = ft.Dropdown(
+        label="Preset",
+        width=250,
+        options=[ft.dropdown.Option(name) for name in presets],
+    )
+    join_preset_btn = ft.IconButton(icon=ft.Icons.PLAY_ARROW, icon_color=ft.Colors.GREEN, tooltip="Join preset")
+    delete_preset_btn = ft.IconButton(icon=ft.Icons.DELETE, icon_color=ft.Colors.RED, tooltip="Delete preset")
+    preset_name_field = ft.TextField(label="Preset name", width=250, hint_text="Example: EU all maps")
+    save_preset_btn = ft.IconButton(icon=ft.Icons.SAVE, tooltip="Save current regions/maps as preset")
+
+    def refresh_presets():
+        """Syncs the preset dropdown and persists the presets"""
+        preset_dropdown.options = [ft.dropdown.Option(name) for name in presets]
+        if preset_dropdown.value not in presets:
+            preset_dropdown.value = None
+        settings.set('presets', list(presets.values()))
+        page.update()
+
+    def on_save_preset(e):
+        """Saves the current regions/maps as a preset"""
+        name = preset_name_field.value.strip()
+        regions = [k for k, v in regions_map.items() if v.value]
+        maps = [k for k, v in maps_map.items() if v.value]
+        if not name or not regions or not maps:
+            queue_status_text.value = "❌ Enter a name and select at least 1 region and 1 map"
+            queue_status_text.color = ft.Colors.RED
+            page.update()
+            return
+
+        presets[name] = {'name': name, 'regions': regions, 'maps': maps, 'query': build_queue_query(regions, maps)}
+        preset_name_field.value = ""
+        preset_dropdown.value = name
+        refresh_presets()
+
+    def on_delete_preset(e):
+        """Deletes the selected preset"""
+        if presets.pop(preset_dropdown.value, None):
+            refresh_presets()
+
+    def on_join_preset(e):
+        if preset_dropdown.value:
+            join_preset(preset_dropdown.value)
+
+    def join_preset_hotkey(index):
+        """Hotkey N joins the N-th preset"""
+        names = list(presets)
+        if index < len(names):
+            join_preset(names[index])
+
+    hotkey_settings = settings.get('hotkeys', {})
+    hotkey_modifiers = hotkey_settings.get('modifiers', DEFAULT_HOTKEY_MODIFIERS)
+    if hotkey_modifiers not in HOTKEY_MODIFIERS:
+        hotkey_modifiers = DEFAULT_HOTKEY_MODIFIERS
+    hotkey_handles = []
+
+    def hotkey_label():
+        if hotkey_modifiers == 'off':
+            return "Preset hotkeys are off (Settings tab)"
+        keys = "+".join(key.capitalize() for key in hotkey_modifiers.split('+'))
+        return f"{keys}+1..9 joins presets in order"
+
+    def on_keyboard(e):
+        """In-window preset hotkeys (only registered while the global hook isn't)"""
+        wanted = hotkey_modifiers.split('+')
+        pressed = {'ctrl': e.ctrl, 'alt': e.alt, 'shift': e.shift}
+        if all(pressed[key] == (key in wanted) for key in pressed) and e.key.isdigit() and e.key != '0':
+            join_preset_hotkey(int(e.key) - 1)
+
+    def apply_hotkeys(modifiers, use_global):
+        """Registers the preset hotkeys with a single handler, returns True if the global hook is used.
+
+        The global `keyboard` hook also fires while the window is focused, so the in-window
+        handler is only registered when the global hook is off or unavailable.
+        """
+        nonlocal hotkey_modifiers
+        hotkey_modifiers = modifiers
+        if hotkey_handles:
+            import keyboard
+            for handle in hotkey_handles:
+                keyboard.remove_hotkey(handle)
+            hotkey_handles.clear()
+        page.on_keyboard_event = None
+        if modifiers == 'off':
+            return False
+
+        if use_global:
+            try:
+                import keyboard
+                for i in range(PRESET_HOTKEYS):
+                    hotkey_handles.append(keyboard.add_hotkey(f"{modifiers}+{i + 1}", join_preset_hotkey, args=(i,)))
+                print(f"[HOTKEYS] Global preset hotkeys registered ({modifiers}+1..9)")
+                return True
+            except ImportError:
+                print("[HOTKEYS] `keyboard` isn't installed, using in-window hotkeys")
+            except Exception as e:
+                print(f"[HOTKEYS] Error registering global hotkeys: {e}")
+                for handle in hotkey_handles:
+                    keyboard.remove_hotkey(handle)
+                hotkey_handles.clear()
+
+        page.on_keyboard_event = on_keyboard
+        return False
+
+    save_preset_btn.on_click = on_save_preset
+    delete_preset_btn.on_click = on_delete_preset
+    join_preset_btn.on_click = on_join_preset
+    global_hotkeys = apply_hotkeys(hotkey_modifiers, hotkey_settings.get('global', False))
+    preset_hotkey_text = ft.Text(hotkey_label(), size=12, color=ft.Colors.GREY)
+
+    # ==================== CONTROL API ====================
+
+    def get_status():
+        """Snapshot of the queue state for the control API (never includes the token)"""
+        snapshot = session.snapshot
+        elapsed = None
+        if krunker.is_queued and snapshot.start_time:
+            elapsed = int(time.time() - snapshot.start_time)
+        return {
+            'logged_in': bool(krunker.token),
+            'queued': krunker.is_queued,
+            'status': snapshot.state,
+            'elapsed': elapsed,
+            'regions': snapshot.regions,
+            'maps': snapshot.maps,
+            'preset': snapshot.preset,
+            'presets': list(presets),
+            'queue_time_by_preset': session.time_by_preset(),
+            'error': snapshot.error,
+            'match': snapshot.match,
+            'notifications': NOTIFICATIONS.stats(),
+        }
+
+    def api_queue(body):
+        """POST /queue (optional JSON body {"preset": name} joins or switches to a preset)"""
+        try:
+            preset = json.loads(body).get('preset') if body else None
+        except (ValueError, AttributeError):
+            return {'success': False, 'error': 'Invalid JSON body'}
+
+        if preset is not None:
+            if preset not in presets:
+                return {'success': False, 'error': f'Unknown preset: {preset}'}
+            join_preset(preset)
+        elif session.snapshot.state not in (IDLE, MATCHED, ERROR):
+            return {'success': False, 'error': 'Already in queue'}
+        else:
+            on_queue(None)
+
+        if session.snapshot.state != CONNECTING:
+            return {'success': False, 'error': queue_status_text.value}
+        return {'success': True}
+
+    def api_leave(body):
+        """POST /leave"""
+        if session.snapshot.state in (IDLE, MATCHED, ERROR):
+            return {'success': False, 'error': 'Not in queue'}
+        on_leave(None)
+        return {'success': True}
+
+    control_server = ControlServer(EVENTS, api_queue, api_leave, get_status,
+                                   allowed_origins=settings.get('control_origins', []))
 
     queue_page = ft.Container(
         content=ft.Column([
@@ -691,11 +1907,19 @@ def main(page: ft.Page):
                 ft.Row([maps_map['eterno_sim']], alignment=ft.MainAxisAlignment.CENTER),
             ], spacing=5),
 
+            ft.Container(height=10),
+
+            ft.Text("⭐ Presets", size=20, weight=ft.FontWeight.BOLD),
+            preset_hotkey_text,
+            ft.Row([preset_dropdown, join_preset_btn, delete_preset_btn], alignment=ft.MainAxisAlignment.CENTER),
+            ft.Row([preset_name_field, save_preset_btn], alignment=ft.MainAxisAlignment.CENTER),
+
             ft.Container(height=20),
 
             # Queue buttons
             queue_btn,
             leave_btn,
+            background_btn,
 
         ],
         horizontal_alignment=ft.CrossAxisAlignment.CENTER,
@@ -707,8 +1931,9 @@ def main(page: ft.Page):
 
     settings_status_text = ft.Text("", size=14, text_align=ft.TextAlign.CENTER)
 
-    # List of clients
-    clients_list = ft.ListView(expand=True, spacing=10)
+    # List of clients (fixed row height lets the ListView only build visible rows)
+    clients_list = ft.ListView(height=300, spacing=10, item_extent=64)
+    client_rows = {}
 
     # Fields to add a custom client
     custom_client_path = ft.TextField(
@@ -724,44 +1949,78 @@ def main(page: ft.Page):
         icon=ft.Icons.ADD
     )
 
+    def format_client_status(status):
+        """Formats the background scan result of a client"""
+        if status is None:
+            return "⏳ Scanning..."
+        if not status['token']:
+            text = "❌ No token"
+        elif status['expired']:
+            text = "⚠️ Token expired"
+        elif status['exp']:
+            text = f"✓ Token (expires {time.strftime('%Y-%m-%d %H:%M', time.localtime(status['exp']))})"
+        else:
+            text = "✓ Token"
+        scanned_at = time.strftime('%H:%M:%S', time.localtime(status['scanned_at']))
+        return f"{text} · scanned {scanned_at} in {status['scan_ms']:.0f} ms"
+
+    def build_client_row(client):
+        """Builds the row of a client (keyed by its path)"""
+        controls = [
+            ft.Column([
+                ft.Text(client['name'], size=16, weight=ft.FontWeight.BOLD),
+                ft.Text(client['path'], size=12, color=ft.Colors.GREY, no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS),
+                ft.Text(format_client_status(client['status']), size=12),
+            ], spacing=0, expand=True),
+        ]
+        if not client['default']:
+            controls.append(ft.IconButton(
+                icon=ft.Icons.DELETE,
+                icon_color=ft.Colors.RED,
+                on_click=lambda e, path=client['path']: remove_client(path)
+            ))
+        return ft.Container(
+            key=client['path'],
+            content=ft.Row(controls, alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+            padding=ft.padding.symmetric(horizontal=10, vertical=4),
+            bgcolor=ft.Colors.BLUE_GREY_800,
+            border_radius=5
+        )
+
     def refresh_clients_list():
-        """"Updates the list of clients"""
-        clients_list.controls = []
-
-        # Add default clients
-        for i, path in enumerate(default_paths):
-            name = "Crankshaft" if i == 0 else "PC7"
-            item = ft.Container(
-                content=ft.Row([
-                    ft.Text(name, size=16, weight=ft.FontWeight.BOLD),
-                    ft.Text(path, size=14, color=ft.Colors.GREY),
-                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
-                padding=10,
-                bgcolor=ft.Colors.BLUE_GREY_800,
-                border_radius=5
-            )
-            clients_list.controls.append(item)
-
-        # Add custom clients
-        for i, client in enumerate(krunker.custom_clients):
-            item = ft.Container(
-                content=ft.Row([
-                    ft.Text(client['name'], size=16, weight=ft.FontWeight.BOLD),
-                    ft.Text(client['path'], size=14, color=ft.Colors.GREY),
-                    ft.IconButton(
-                        icon=ft.Icons.DELETE,
-                        icon_color=ft.Colors.RED,
-                        on_click=lambda e, idx=i: remove_client(idx)
-                    )
-                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
-                padding=10,
-                bgcolor=ft.Colors.BLUE_GREY_800,
-                border_radius=5
-            )
-            clients_list.controls.append(item)
+        """Syncs the list with the registry: only added/removed rows change"""
+        clients = list(krunker.clients)
+        paths = {client['path'] for client in clients}
+
+        for path in [path for path in client_rows if path not in paths]:
+            clients_list.controls.remove(client_rows.pop(path))
+        for client in clients:
+            if client['path'] not in client_rows:
+                row = build_client_row(client)
+                client_rows[client['path']] = row
+                clients_list.controls.append(row)
+                client_scanner.submit(client['path'])
+
+        client_dropdown.options = [ft.dropdown.Option(client['path'], client['name']) for client in clients]
+        if client_dropdown.value not in paths:
+            client_dropdown.value = None
 
         page.update()
 
+    def on_client_scanned(path, status):
+        """Shows a background scan result on its row"""
+        client = krunker.clients.get(path)
+        row = client_rows.get(path)
+        if client is None or row is None:
+            return
+        client['status'] = status
+        status_text = row.content.controls[0].controls[2]
+        status_text.value = format_client_status(status)
+        if row.page:
+            status_text.update()
+
+    client_scanner = ClientScanner(krunker.get_token_from_leveldb, on_client_scanned)
+
     def add_client(e):
         """Adds a custom client"""
         path = custom_client_path.value.strip()
@@ -781,32 +2040,213 @@ def main(page: ft.Page):
         # Extract client name from path
         name = os.path.basename(os.path.dirname(os.path.dirname(path)))
 
-        # Check if client already exists
-        for client in krunker.custom_clients:
-            if client['path'] == path:
-                settings_status_text.value = "❌ This client already exists"
-                settings_status_text.color = ft.Colors.RED
-                page.update()
-                return
+        # Add the client (the registry rejects duplicate paths)
+        if krunker.clients.add(name, path) is None:
+            settings_status_text.value = "❌ This client already exists"
+            settings_status_text.color = ft.Colors.RED
+            page.update()
+            return
 
-        # Add the client
-        krunker.custom_clients.append({'name': name, 'path': path})
+        settings.set('custom_clients', krunker.clients.custom())
         settings_status_text.value = f"✓ Added client: {name}"
         settings_status_text.color = ft.Colors.GREEN
         custom_client_path.value = ""
         refresh_clients_list()
 
-    def remove_client(idx):
+    def remove_client(path):
         """Removes a custom client"""
-        if 0 <= idx < len(krunker.custom_clients):
-            name = krunker.custom_clients[idx]['name']
-            krunker.custom_clients.pop(idx)
-            settings_status_text.value = f"✓ Removed client: {name}"
+        client = krunker.clients.remove(path)
+        if client:
+            settings.set('custom_clients', krunker.clients.custom())
+            settings_status_text.value = f"✓ Removed client: {client['name']}"
             settings_status_text.color = ft.Colors.GREEN
             refresh_clients_list()
 
     add_client_btn.on_click = add_client
 
+    # Profiling (diagnostics)
+    profiling_switch = ft.Switch(label="Profiling mode", value=PROFILER.enabled)
+    capture_btn = ft.ElevatedButton(
+        f"Capture CPU Profile ({PROFILE_CAPTURE_SECONDS}s)",
+        width=350,
+        height=45,
+        icon=ft.Icons.SPEED,
+        disabled=not PROFILER.enabled
+    )
+
+    def on_profiling_toggle(e):
+        """Enables or disables the profiling mode"""
+        if profiling_switch.value:
+            PROFILER.start()
+            settings_status_text.value = f"✓ Profiling enabled ({PROFILE_DIR})"
+        elif PROFILER.stop():
+            settings_status_text.value = "✓ Profiling disabled, restart the app to stop profiling running threads"
+        else:
+            settings_status_text.value = "✓ Profiling disabled"
+        settings_status_text.color = ft.Colors.GREEN
+        capture_btn.disabled = not PROFILER.enabled
+        page.update()
+
+    def on_capture(e):
+        """Captures a cProfile window"""
+        if PROFILER.capturing:
+            return
+        capture_btn.disabled = True
+        settings_status_text.value = f"⏳ Capturing CPU profile ({PROFILE_CAPTURE_SECONDS}s)..."
+        settings_status_text.color = ft.Colors.BLUE
+        page.update()
+
+        path = PROFILER.capture()
+        if path:
+            settings_status_text.value = f"✓ Profile saved: {path}"
+            settings_status_text.color = ft.Colors.GREEN
+        else:
+            settings_status_text.value = "❌ Nothing was captured"
+            settings_status_text.color = ft.Colors.RED
+        capture_btn.disabled = not PROFILER.enabled
+        page.update()
+
+    profiling_switch.on_change = on_profiling_toggle
+    capture_btn.on_click = on_capture
+
+    control_switch = ft.Switch(
+        label=f"Local control API ({CONTROL_HOST}:{CONTROL_PORT})",
+        value=settings.get('control_api', False)
+    )
+
+    def on_control_toggle(e):
+        """Starts or stops the local control API"""
+        if control_switch.value:
+            if control_server.start():
+                settings_status_text.value = f"✓ Control API on http://{CONTROL_HOST}:{CONTROL_PORT}"
+                settings_status_text.color = ft.Colors.GREEN
+            else:
+                control_switch.value = False
+                settings_status_text.value = f"❌ Port {CONTROL_PORT} is unavailable"
+                settings_status_text.color = ft.Colors.RED
+        else:
+            control_server.stop()
+            settings_status_text.value = "✓ Control API stopped"
+            settings_status_text.color = ft.Colors.GREEN
+        settings.set('control_api', control_switch.value)
+        page.update()
+
+    control_switch.on_change = on_control_toggle
+
+    control_origins_field = ft.TextField(
+        label="Allowed overlay origins (comma separated, e.g. https://overlay.example.com)",
+        width=350,
+        value=", ".join(sorted(control_server.allowed_origins)),
+    )
+
+    def on_control_origins_change(e):
+        """Saves the origins allowed to read the control API from a browser"""
+        entries = [entry for entry in control_origins_field.value.split(',') if entry.strip()]
+        origins = {normalize_origin(entry) for entry in entries}
+        if None in origins:
+            settings_status_text.value = "❌ Origins look like https://host[:port]"
+            settings_status_text.color = ft.Colors.RED
+            page.update()
+            return
+        control_server.allowed_origins = origins
+        settings.set('control_origins', sorted(origins))
+        control_origins_field.value = ", ".join(sorted(origins))
+        settings_status_text.value = f"✓ {len(origins)} allowed origin(s) saved"
+        settings_status_text.color = ft.Colors.GREEN
+        page.update()
+
+    control_origins_field.on_blur = on_control_origins_change
+    control_origins_field.on_submit = on_control_origins_change
+
+    # Preset hotkeys
+    hotkey_dropdown = ft.Dropdown(
+        label="Modifiers (+ 1..9)",
+        width=350,
+        value=hotkey_modifiers,
+        options=[ft.dropdown.Option(key, label) for key, label in HOTKEY_MODIFIERS.items()],
+    )
+    global_hotkeys_switch = ft.Switch(label="Also when the window isn't focused (requires keyboard)",
+                                      value=global_hotkeys)
+
+    def on_hotkeys_change(e):
+        """Re-registers the preset hotkeys with the chosen modifiers/scope"""
+        wants_global = global_hotkeys_switch.value
+        global_hotkeys_switch.value = apply_hotkeys(hotkey_dropdown.value, wants_global)
+        settings.set('hotkeys', {'modifiers': hotkey_dropdown.value, 'global': global_hotkeys_switch.value})
+        preset_hotkey_text.value = hotkey_label()
+        if wants_global and not global_hotkeys_switch.value:
+            settings_status_text.value = "❌ Global hotkeys unavailable (needs `pip install keyboard`, see console)"
+            settings_status_text.color = ft.Colors.RED
+        else:
+            settings_status_text.value = f"✓ {hotkey_label()}"
+            settings_status_text.color = ft.Colors.GREEN
+        page.update()
+
+    hotkey_dropdown.on_change = on_hotkeys_change
+    global_hotkeys_switch.on_change = on_hotkeys_change
+
+    # Notifications
+    sound_switch = ft.Switch(label="Match sound", value='sound' in notification_config)
+    desktop_switch = ft.Switch(label="Desktop notification (requires plyer)", value='desktop' in notification_config)
+    discord_webhook_field = ft.TextField(
+        label="Discord Webhook URL",
+        width=350,
+        value=notification_config.get('discord', {}).get('url', '')
+    )
+    http_callback_field = ft.TextField(
+        label="HTTP Callback URL",
+        width=350,
+        hint_text="Example: http://127.0.0.1:9000/match",
+        value=notification_config.get('http', {}).get('url', '')
+    )
+    script_field = ft.TextField(
+        label="Custom Script Path",
+        width=350,
+        value=notification_config.get('script', {}).get('path', '')
+    )
+    save_notifications_btn = ft.ElevatedButton(
+        "Save Notifications",
+        width=350,
+        height=45,
+        icon=ft.Icons.SAVE
+    )
+    test_notifications_btn = ft.ElevatedButton(
+        "Test Notifications",
+        width=350,
+        height=45,
+        icon=ft.Icons.NOTIFICATIONS_ACTIVE
+    )
+
+    def on_save_notifications(e):
+        """Saves the notification sinks"""
+        config = {}
+        if sound_switch.value:
+            config['sound'] = {}
+        if desktop_switch.value:
+            config['desktop'] = {}
+        if discord_webhook_field.value.strip():
+            config['discord'] = {'url': discord_webhook_field.value.strip()}
+        if http_callback_field.value.strip():
+            config['http'] = {'url': http_callback_field.value.strip()}
+        if script_field.value.strip():
+            config['script'] = {'path': script_field.value.strip()}
+
+        NOTIFICATIONS.configure(config)
+        settings.set('notifications', config)
+        settings_status_text.value = f"✓ Notifications saved ({len(config)} active)"
+        settings_status_text.color = ft.Colors.GREEN
+        page.update()
+
+    def on_test_notifications(e):
+        """Sends a test notification to every sink"""
+        NOTIFICATIONS.notify('MATCHED', map='test', region='test', server='test', test=True)
+        settings_status_text.value = "✓ Test notification sent"
+        settings_status_text.color = ft.Colors.GREEN
+        page.update()
+
+    save_notifications_btn.on_click = on_save_notifications
+    test_notifications_btn.on_click = on_test_notifications
+
     settings_page = ft.Container(
         content=ft.Column([
             ft.Container(height=5),
@@ -835,6 +2275,43 @@ def main(page: ft.Page):
             custom_client_path,
             add_client_btn,
 
+            ft.Container(height=20),
+            ft.Divider(height=20),
+
+            ft.Text("🧪 Diagnostics", size=20, weight=ft.FontWeight.BOLD),
+            ft.Text("Thread CPU, cProfile and memory dumps", size=12, color=ft.Colors.GREY),
+            profiling_switch,
+            capture_btn,
+
+            ft.Container(height=20),
+            ft.Divider(height=20),
+
+            ft.Text("🎛️ Remote Control", size=20, weight=ft.FontWeight.BOLD),
+            ft.Text("Let overlays and stream decks join/leave the queue", size=12, color=ft.Colors.GREY),
+            control_switch,
+            control_origins_field,
+
+            ft.Container(height=20),
+            ft.Divider(height=20),
+
+            ft.Text("⌨️ Hotkeys", size=20, weight=ft.FontWeight.BOLD),
+            ft.Text("Join presets from the keyboard", size=12, color=ft.Colors.GREY),
+            hotkey_dropdown,
+            global_hotkeys_switch,
+
+            ft.Container(height=20),
+            ft.Divider(height=20),
+
+            ft.Text("🔔 Notifications", size=20, weight=ft.FontWeight.BOLD),
+            ft.Text("Alerts sent when a match is found", size=12, color=ft.Colors.GREY),
+            sound_switch,
+            desktop_switch,
+            discord_webhook_field,
+            http_callback_field,
+            script_field,
+            save_notifications_btn,
+            test_notifications_btn,
+
         ],
         horizontal_alignment=ft.CrossAxisAlignment.CENTER,
         scroll=ft.ScrollMode.AUTO),
@@ -876,11 +2353,34 @@ def main(page: ft.Page):
     #     bgcolor=ft.Colors.BLUE_900,
     # )
 
+    # Warm start: a valid cached token goes straight to the Queue tab
+    if krunker.token:
+        login_status_text.value = "✓ Logged in with saved token."
+        login_status_text.color = ft.Colors.GREEN
+        tabs.selected_index = 1
+
     page.add(tabs)
+    usage.mark('full')
+    refresh_clients_list()
+    if control_switch.value:
+        control_server.start()
+    update_presence()
+
+    startup = {
+        'ready': 'queue' if krunker.token else 'login',
+        'main_ms': round((time.perf_counter() - startup_time) * 1000, 1),
+        'settings_ms': round(settings_time * 1000, 1),
+        'launch_ms': round((time.time() - LAUNCH_TIME) * 1000, 1) if LAUNCH_TIME else None,
+    }
+    print(f"[STARTUP] {json.dumps(startup)}")
+    if STARTUP_PROBE:
+        page.window.destroy()
 
     # Close RPC when the app closes
     def on_window_event(e):
         if e.data == "close":
+            settings.flush()
+            control_server.stop()
             if RPC is not None:
                 RPC.close()
                 print("Rich Presence disconnected")
@@ -888,4 +2388,6 @@ def main(page: ft.Page):
     page.on_window_event = on_window_event
 
 if __name__ == "__main__":
+    if PROFILE_ENV:
+        PROFILER.start()
     ft.app(target=main)
@@ -0,0 +1,225 @@
+import json
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+
+MATCH_SOUND_URL = "https://files.catbox.moe/qprgrz.mp3"
+NOTIFY_QUEUE_SIZE = 32
+NOTIFY_RETRY_DELAY = 0.5
+NOTIFY_LATENCY_HISTORY = 100
+# Events allowed to wait behind a sink's busy threads before new ones count as failures
+NOTIFY_SINK_BACKLOG = 4
+
+NOTIFIERS = {}
+
+def register_notifier(cls):
+    """Registers a notifier class under its `name`"""
+    NOTIFIERS[cls.name] = cls
+    return cls
+
+class Notifier:
+    """Base class for match notification sinks
+
+    Subclasses implement send(event, timeout), must return or raise within `timeout` seconds
+    and raise on failure. The pipeline handles retries (with backoff) and runs each sink in its
+    own pool of `concurrency` threads.
+    """
+    name = None
+    timeout = 5
+    retries = 2
+    concurrency = 1
+
+    def __init__(self, **options):
+        self.options = options
+
+    def send(self, event, timeout):
+        raise NotImplementedError
+
+def _match_message(event):
+    if event.get('test'):
+        return "🔔 Test notification from Krunker External Queue"
+    return f"🎉 Match found! Map: {event.get('map', 'Unknown').upper()} | Region: {event.get('region', 'Unknown').upper()} | Server: {event.get('server', 'Unknown')}"
+
+@register_notifier
+class SoundNotifier(Notifier):
+    """Plays the match sound (downloaded once, played without blocking)"""
+    name = 'sound'
+    retries = 0
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._path = None
+
+    def send(self, event, timeout):
+        from playsound3 import playsound
+        sound = self.options.get('url') or MATCH_SOUND_URL
+        if sound.startswith(('http://', 'https://')):
+            # playsound3 downloads URLs without a timeout
+            if self._path is None:
+                response = requests.get(sound, timeout=timeout)
+                response.raise_for_status()
+                suffix = os.path.splitext(urlparse(sound).path)[1]
+                with tempfile.NamedTemporaryFile(prefix="krunker-match-", suffix=suffix, delete=False) as f:
+                    f.write(response.content)
+                self._path = f.name
+            sound = self._path
+        playsound(sound, block=False)
+
+@register_notifier
+class DesktopNotifier(Notifier):
+    """Shows a desktop notification (requires `plyer`)"""
+    name = 'desktop'
+    retries = 0
+
+    def send(self, event, timeout):
+        # plyer has no timeout: a stuck backend only ever holds this sink's single thread
+        from plyer import notification
+        notification.notify(title="Krunker External Queue", message=_match_message(event),
+                            app_name="Krunker External Queue", timeout=10)
+
+@register_notifier
+class DiscordWebhookNotifier(Notifier):
+    """Posts a message to a Discord webhook"""
+    name = 'discord'
+
+    def send(self, event, timeout):
+        response = requests.post(self.options['url'], json={'content': _match_message(event)}, timeout=timeout)
+        response.raise_for_status()
+
+@register_notifier
+class HttpCallbackNotifier(Notifier):
+    """POSTs the raw event as JSON to a local HTTP endpoint"""
+    name = 'http'
+    timeout = 2
+
+    def send(self, event, timeout):
+        response = requests.post(self.options['url'], json=event, timeout=timeout)
+        response.raise_for_status()
+
+@register_notifier
+class ScriptNotifier(Notifier):
+    """Runs a custom script with the event as JSON on stdin and KRUNKER_* variables"""
+    name = 'script'
+    timeout = 10
+    retries = 0
+
+    def send(self, event, timeout):
+        env = dict(os.environ)
+        for key in ('type', 'map', 'region', 'server'):
+            env[f"KRUNKER_{key.upper()}"] = str(event.get(key, ''))
+        subprocess.run([self.options['path']], input=json.dumps(event), text=True, env=env,
+                       timeout=timeout, check=True, capture_output=True)
+
+class NotificationPipeline:
+    """Delivers events to every configured sink without blocking the caller
+
+    notify() only does a put_nowait on a bounded queue; a dispatcher thread hands each event
+    to the sinks' own executors so a slow or failing sink never delays the others. A sink
+    with more than `concurrency + NOTIFY_SINK_BACKLOG` events outstanding fails new ones
+    right away instead of queueing them without bound.
+    """
+    def __init__(self, queue_size=NOTIFY_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._sinks = []
+        self._dispatcher = None
+        self._pending = {}
+        self.latencies = {}
+        self.failures = {}
+
+    def configure(self, config):
+        """(Re)builds the sinks from {name: options} (unknown names are ignored)"""
+        sinks = []
+        for name, options in config.items():
+            cls = NOTIFIERS.get(name)
+            if cls is None:
+                print(f"[NOTIFY] Unknown notifier: {name}")
+                continue
+            notifier = cls(**(options or {}))
+            executor = ThreadPoolExecutor(max_workers=notifier.concurrency, thread_name_prefix=f"notify-{name}")
+            sinks.append((notifier, executor))
+            self.latencies.setdefault(name, deque(maxlen=NOTIFY_LATENCY_HISTORY))
+            self.failures.setdefault(name, 0)
+
+        with self._lock:
+            old_sinks, self._sinks = self._sinks, sinks
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, name="notify-dispatcher", daemon=True)
+                self._dispatcher.start()
+        for _, executor in old_sinks:
+            executor.shutdown(wait=False)
+
+    def notify(self, event_type, **payload):
+        """Queues an event for delivery, returns False if the queue is full"""
+        try:
+            self._queue.put_nowait({'type': event_type, 'time': time.time(), **payload})
+            return True
+        except queue.Full:
+            print(f"[NOTIFY] Queue full, dropping {event_type}")
+            return False
+
+    def _dispatch_loop(self):
+        while True:
+            event = self._queue.get()
+            with self._lock:
+                sinks = list(self._sinks)
+            for notifier, executor in sinks:
+                with self._lock:
+                    pending = self._pending.get(notifier, 0)
+                    if pending >= notifier.concurrency + NOTIFY_SINK_BACKLOG:
+                        self.failures[notifier.name] += 1
+                        print(f"[NOTIFY] {notifier.name} is backed up ({pending} outstanding), dropping {event['type']}")
+                        continue
+                    self._pending[notifier] = pending + 1
+                try:
+                    executor.submit(self._deliver, notifier, event)
+                except RuntimeError:
+                    self._done(notifier)  # Executor shut down by a reconfigure
+
+    def _done(self, notifier):
+        with self._lock:
+            self._pending[notifier] -= 1
+            if not self._pending[notifier]:
+                del self._pending[notifier]
+
+    def _deliver(self, notifier, event):
+        error = None
+        try:
+            for attempt in range(notifier.retries + 1):
+                try:
+                    notifier.send(event, notifier.timeout)
+                    latency = time.time() - event['time']
+                    self.latencies[notifier.name].append(latency)
+                    print(f"[NOTIFY] {notifier.name} delivered in {latency * 1000:.0f} ms")
+                    return
+                except Exception as e:
+                    error = e
+                    if attempt < notifier.retries:
+                        time.sleep(NOTIFY_RETRY_DELAY * 2 ** attempt)
+            self.failures[notifier.name] += 1
+            print(f"[NOTIFY] {notifier.name} failed after {notifier.retries + 1} attempt(s): {error}")
+        finally:
+            self._done(notifier)
+
+    def stats(self):
+        """Per-sink delivery count, failures and latency (ms)"""
+        result = {}
+        for name, latencies in self.latencies.items():
+            values = sorted(latencies)
+            result[name] = {
+                'delivered': len(values),
+                'failed': self.failures.get(name, 0),
+                'avg_ms': round(sum(values) / len(values) * 1000, 1) if values else None,
+                'p95_ms': round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 1) if values else None,
+            }
+        return result
+
+NOTIFICATIONS = NotificationPipeline()
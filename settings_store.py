@@ -0,0 +1,196 @@
+import base64
+import json
+import os
+import sys
+import threading
+import time
+
+from token_inventory import jwt_claims
+
+SETTINGS_VERSION = 1
+SETTINGS_SAVE_DELAY = 0.5
+TOKEN_EXPIRY_MARGIN = 60
+KEYRING_SERVICE = "krunker_external_queue"
+
+class SettingsStore:
+    """Versioned JSON settings file, read once at startup and written atomically with a debounce"""
+    def __init__(self, path, delay=SETTINGS_SAVE_DELAY):
+        self.path = path
+        self.delay = delay
+        self.data = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def load(self):
+        """Loads the settings file (missing, corrupt or unknown versions start empty)"""
+        try:
+            with open(self.path, 'rb') as f:
+                data = json.loads(f.read())
+        except FileNotFoundError:
+            data = {}
+        except Exception as e:
+            print(f"[SETTINGS] Error loading {self.path}: {e}")
+            data = {}
+
+        if not isinstance(data, dict) or data.get('version') != SETTINGS_VERSION:
+            data = {}
+        data.pop('version', None)
+        self.data = data
+        return data
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        """Updates a value and schedules a save"""
+        self.data[key] = value
+        self.schedule_save()
+
+    def delete(self, key):
+        if self.data.pop(key, None) is not None:
+            self.schedule_save()
+
+    def schedule_save(self):
+        """Debounces writes: only the last change within the delay hits the disk"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.save)
+            self._timer.name = "settings-writer"
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Writes pending changes immediately"""
+        with self._lock:
+            pending = self._timer is not None
+            if pending:
+                self._timer.cancel()
+        if pending:
+            self.save()
+
+    def save(self):
+        """Writes the settings atomically (temp file + rename)"""
+        with self._lock:
+            self._timer = None
+            payload = json.dumps({'version': SETTINGS_VERSION, **self.data}, indent=2)
+            tmp_path = self.path + '.tmp'
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"[SETTINGS] Error saving: {e}")
+
+def token_expired(token, margin=TOKEN_EXPIRY_MARGIN):
+    """Checks the JWT `exp` claim (tokens without one are considered valid)"""
+    exp = jwt_claims(token).get('exp')
+    return isinstance(exp, (int, float)) and exp <= time.time() + margin
+
+def _dpapi(data, protect):
+    """Encrypts/decrypts bytes for the current Windows user with DPAPI"""
+    import ctypes
+    from ctypes import wintypes
+
+    class DATA_BLOB(ctypes.Structure):
+        _fields_ = [('cbData', wintypes.DWORD), ('pbData', ctypes.POINTER(ctypes.c_char))]
+
+    buffer = ctypes.create_string_buffer(data, len(data))
+    blob_in = DATA_BLOB(len(data), ctypes.cast(buffer, ctypes.POINTER(ctypes.c_char)))
+    blob_out = DATA_BLOB()
+    func = ctypes.windll.crypt32.CryptProtectData if protect else ctypes.windll.crypt32.CryptUnprotectData
+    if not func(ctypes.byref(blob_in), None, None, None, None, 0x01, ctypes.byref(blob_out)):  # CRYPTPROTECT_UI_FORBIDDEN
+        raise OSError("DPAPI call failed")
+    try:
+        return ctypes.string_at(blob_out.pbData, blob_out.cbData)
+    finally:
+        ctypes.windll.kernel32.LocalFree(blob_out.pbData)
+
+def _read_private(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read().strip() or None
+
+def _write_private(path, text):
+    """Writes a file only the current user can read (0600), atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+class TokenCache:
+    """Caches the token between launches.
+
+    - Windows: DPAPI-encrypted inside the settings file (no extra dependency and no slow
+      backend discovery at startup)
+    - Elsewhere: the OS keyring if `keyring` is installed, otherwise in plain text in
+      `token_path`, readable only by the current user (0600). That file is not encrypted:
+      anyone who can read your files as you can read the token.
+    """
+    def __init__(self, store, token_path):
+        self.store = store
+        self.token_path = token_path
+
+    def _keyring(self):
+        if sys.platform == 'win32':
+            return None
+        try:
+            import keyring
+            return keyring
+        except ImportError:
+            return None
+
+    def load(self):
+        """Returns the cached token, or None if there is none or it has expired"""
+        token = None
+        try:
+            keyring = self._keyring()
+            if keyring is not None:
+                token = keyring.get_password(KEYRING_SERVICE, 'token')
+            elif sys.platform == 'win32':
+                encrypted = self.store.get('token')
+                if encrypted:
+                    token = _dpapi(base64.b64decode(encrypted), protect=False).decode('utf-8')
+            elif os.path.exists(self.token_path):
+                token = _read_private(self.token_path)
+        except Exception as e:
+            print(f"[TOKEN CACHE] Error loading: {e}")
+            return None
+
+        if token and token_expired(token):
+            print("[TOKEN CACHE] Cached token expired")
+            self.clear()
+            return None
+        return token
+
+    def save(self, token):
+        """Stores the token"""
+        try:
+            keyring = self._keyring()
+            if keyring is not None:
+                keyring.set_password(KEYRING_SERVICE, 'token', token)
+                return
+            if sys.platform == 'win32':
+                encrypted = _dpapi(token.encode('utf-8'), protect=True)
+                self.store.set('token', base64.b64encode(encrypted).decode('ascii'))
+            else:
+                _write_private(self.token_path, token)
+        except Exception as e:
+            print(f"[TOKEN CACHE] Error saving: {e}")
+
+    def clear(self):
+        """Removes the cached token"""
+        try:
+            keyring = self._keyring()
+            if keyring is not None:
+                keyring.delete_password(KEYRING_SERVICE, 'token')
+            elif sys.platform == 'win32':
+                self.store.delete('token')
+            elif os.path.exists(self.token_path):
+                os.remove(self.token_path)
+        except Exception as e:
+            print(f"[TOKEN CACHE] Error clearing: {e}")
@@ -0,0 +1,165 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from settings_store import SettingsStore, TokenCache
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def _fake_token(lifetime=86400):
+    header = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b'=').decode()
+    claims = json.dumps({'sub': 'benchmark', 'exp': int(time.time()) + lifetime}).encode()
+    payload = base64.urlsafe_b64encode(claims).rstrip(b'=').decode()
+    return f"{header}.{payload}.{base64.urlsafe_b64encode(os.urandom(32)).rstrip(b'=').decode()}"
+
+def data_dir(appdata):
+    return os.path.join(appdata, 'krunker_external_queue')
+
+def prepare_client(appdata):
+    """Creates a Crankshaft leveldb holding a token, as the Detect Token login would find it"""
+    path = os.path.join(appdata, 'crankshaft', 'Local Storage', 'leveldb')
+    os.makedirs(path)
+    with open(os.path.join(path, '000004.log'), 'wb') as f:
+        f.write(b'_https://krunker.io\x00\x01__FRVR_auth_access_token\x01' + _fake_token().encode() + b'\x00')
+    return path
+
+def prepare_warm(appdata, clients=50, presets=9):
+    """Writes the settings a returning user would have (clients, presets, cached token)"""
+    store = SettingsStore(os.path.join(data_dir(appdata), 'settings.json'))
+    store.load()
+    store.data.update({
+        'custom_clients': [{'name': f"client-{i}", 'path': f"/tmp/client-{i}/Local Storage/leveldb"} for i in range(clients)],
+        'regions': ['EU', 'NA'],
+        'maps': ['burg_new', 'site', 'bureau'],
+        'presets': [{'name': f"preset-{i}", 'regions': ['EU'], 'maps': ['site']} for i in range(presets)],
+    })
+    TokenCache(store, os.path.join(data_dir(appdata), 'token')).save(_fake_token())
+    store.flush()
+
+def _find(control, kind, text):
+    """Depth-first search of the control tree for a `kind` control labelled `text`"""
+    if isinstance(control, kind) and text in (getattr(control, 'text', None), getattr(control, 'label', None)):
+        return control
+    for child in control._get_children():
+        found = _find(child, kind, text)
+        if found is not None:
+            return found
+    return None
+
+def probe():
+    """Child process: imports the app and runs main() on a headless page, reports the timings.
+
+    On a cold start it then does what a new user does on the Login tab (select the client,
+    Detect Token) and reports when the token is in place.
+    """
+    launch_time = float(os.environ['KRUNKER_LAUNCH_TIME'])
+    started = time.time()
+    import flet as ft
+    from flet.core.connection import Connection
+    from flet.core.protocol import PageCommandResponsePayload, PageCommandsBatchResponsePayload
+
+    class HeadlessConnection(Connection):
+        """Accepts the page's commands without a Flet client (assigns control ids like the server)"""
+        def __init__(self):
+            super().__init__()
+            self._next_id = 0
+
+        def send_command(self, session_id, command):
+            return PageCommandResponsePayload(result="", error="")
+
+        def send_commands(self, session_id, commands):
+            results = []
+            for command in commands:
+                if command.name == 'add':
+                    ids = []
+                    for _ in command.commands:
+                        self._next_id += 1
+                        ids.append(f"_{self._next_id}")
+                    results.append(" ".join(ids))
+            return PageCommandsBatchResponsePayload(results=results, error="")
+
+    sys.path.insert(0, HERE)
+    import app
+    imported = time.time()
+
+    page = ft.Page(HeadlessConnection(), 'benchmark', asyncio.new_event_loop())
+    app.main(page)
+    ready = time.time()
+    report = {
+        'ready': 'queue' if app.krunker.token else 'login',
+        'interpreter_ms': round((started - launch_time) * 1000, 1),
+        'import_ms': round((imported - started) * 1000, 1),
+        'main_ms': round((ready - imported) * 1000, 1),
+        'launch_ms': round((ready - launch_time) * 1000, 1),
+    }
+
+    if not app.krunker.token:
+        _find(page, ft.Dropdown, "Select Client").value = os.path.join(
+            os.environ['APPDATA'], 'crankshaft', 'Local Storage', 'leveldb')
+        _find(page, ft.ElevatedButton, "Detect Token").on_click(None)
+        if app.krunker.token:
+            report['logged_in_ms'] = round((time.time() - launch_time) * 1000, 1)
+
+    print(json.dumps(report), flush=True)
+    os._exit(0)  # Don't wait for the app's background threads (Discord RPC, notifications)
+
+def launch(appdata, ui):
+    """Launches the app (or the state probe) and returns its startup report"""
+    env = dict(os.environ, APPDATA=appdata, KRUNKER_LAUNCH_TIME=repr(time.time()))
+    if ui:
+        env['KRUNKER_STARTUP_PROBE'] = '1'
+    command = [sys.executable, os.path.join(HERE, 'app.py')] if ui else [sys.executable, os.path.abspath(__file__), '--probe']
+    output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+    prefix = '[STARTUP] ' if ui else '{'
+    for line in output.splitlines():
+        if line.startswith(prefix):
+            return json.loads(line[len('[STARTUP] '):] if ui else line)
+    raise RuntimeError(f"No startup report in output:\n{output}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold vs warm start benchmark (launch to ready)")
+    parser.add_argument('-n', '--runs', type=int, default=10)
+    parser.add_argument('--ui', action='store_true', help="launch the full Flet window (needs a display) instead of a headless page")
+    parser.add_argument('--probe', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.probe:
+        probe()
+        return 0
+
+    root = tempfile.mkdtemp(prefix='krunker_startup_')
+    try:
+        warm = os.path.join(root, 'warm')
+        prepare_client(warm)
+        prepare_warm(warm)
+
+        def cold():
+            # A fresh directory per run: the Detect Token login saves the token
+            appdata = tempfile.mkdtemp(dir=root)
+            prepare_client(appdata)
+            return appdata
+
+        launch(warm, args.ui)  # Warm up the OS file cache
+        for name, appdata in (('cold', cold), ('warm', lambda: warm)):
+            reports = [launch(appdata(), args.ui) for _ in range(args.runs)]
+            median = {key: statistics.median(report[key] for report in reports)
+                      for key in reports[0] if key.endswith('_ms') and reports[0][key] is not None}
+            print(f"[BENCHMARK] {name}: ready on {reports[0]['ready']} tab, launch-to-ready median "
+                  f"{median['launch_ms']:.0f} ms, max {max(report['launch_ms'] for report in reports):.0f} ms ({args.runs} runs)")
+            print("[BENCHMARK]   " + ", ".join(f"{key} {value:.0f}" for key, value in median.items()))
+        print("[BENCHMARK] Cold logged_in_ms is launch to token detected (Detect Token on the Login tab), "
+              "without the user's clicks; a username/password login adds the network round-trip and maybe 2FA")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
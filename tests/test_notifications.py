@@ -0,0 +1,157 @@
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import notifications
+from notifications import NOTIFIERS, HttpCallbackNotifier, NotificationPipeline, Notifier
+
+class _SinkHandler(BaseHTTPRequestHandler):
+    """Stand-in for a Discord webhook / HTTP callback, replies from the server's script"""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        with server.lock:
+            server.requests.append(json.loads(body))
+            code = server.codes.pop(0) if server.codes else 204
+        time.sleep(server.delay)
+        self.send_response(code)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+class _Sink:
+    """Local HTTP server recording the JSON bodies it receives"""
+    def __init__(self, codes=(), delay=0):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _SinkHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.codes = list(codes)
+        self.server.delay = delay
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/hook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def requests(self):
+        return self.server.requests
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class _ImpatientHttpNotifier(HttpCallbackNotifier):
+    name = 'impatient'
+    timeout = 0.2
+    retries = 1
+
+class _HangingNotifier(Notifier):
+    """Ignores its timeout, like a sink stuck in a blocking call"""
+    name = 'hanging'
+    retries = 0
+    release = threading.Event()
+
+    def send(self, event, timeout):
+        self.release.wait()
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+class NotificationPipelineTests(unittest.TestCase):
+    def setUp(self):
+        self.sinks = []
+        self.pipeline = NotificationPipeline()
+        patcher = mock.patch.object(notifications, 'NOTIFY_RETRY_DELAY', 0.01)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def sink(self, **kwargs):
+        sink = _Sink(**kwargs)
+        self.sinks.append(sink)
+        return sink
+
+    def delivered(self, name):
+        return self.pipeline.stats()[name]['delivered']
+
+    def test_notify_does_not_block(self):
+        sink = self.sink(delay=1)
+        self.pipeline.configure({'http': {'url': sink.url}})
+
+        started = time.perf_counter()
+        self.assertTrue(self.pipeline.notify('MATCHED', map='sandstorm', region='fra', server='1'))
+        self.assertLess(time.perf_counter() - started, 0.05)
+        self.assertTrue(_wait_for(lambda: sink.requests))
+        self.assertEqual(sink.requests[0]['map'], 'sandstorm')
+
+    def test_server_error_is_retried(self):
+        sink = self.sink(codes=[500, 503])
+        self.pipeline.configure({'discord': {'url': sink.url}})
+
+        self.pipeline.notify('MATCHED', map='sandstorm', region='fra', server='1')
+        self.assertTrue(_wait_for(lambda: self.delivered('discord') == 1))
+        self.assertEqual(len(sink.requests), 3)
+        self.assertIn('SANDSTORM', sink.requests[-1]['content'])
+        self.assertEqual(self.pipeline.stats()['discord']['failed'], 0)
+
+    def test_slow_sink_times_out_without_delaying_others(self):
+        slow, fast = self.sink(delay=2), self.sink()
+        with mock.patch.dict(NOTIFIERS, {'impatient': _ImpatientHttpNotifier}):
+            self.pipeline.configure({'impatient': {'url': slow.url}, 'http': {'url': fast.url}})
+
+        started = time.perf_counter()
+        self.pipeline.notify('MATCHED', map='sandstorm', region='fra', server='1')
+        self.assertTrue(_wait_for(lambda: self.delivered('http') == 1))
+        self.assertLess(time.perf_counter() - started, _ImpatientHttpNotifier.timeout)
+
+        self.assertTrue(_wait_for(lambda: self.pipeline.stats()['impatient']['failed'] == 1, timeout=2))
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual(len(slow.requests), 2)
+        self.assertEqual(self.delivered('impatient'), 0)
+
+    def test_hung_sink_backlog_is_bounded(self):
+        self.addCleanup(_HangingNotifier.release.set)
+        with mock.patch.dict(NOTIFIERS, {'hanging': _HangingNotifier}):
+            self.pipeline.configure({'hanging': {}})
+
+        events = _HangingNotifier.concurrency + notifications.NOTIFY_SINK_BACKLOG + 3
+        for _ in range(events):
+            self.pipeline.notify('MATCHED', map='sandstorm', region='fra', server='1')
+        self.assertTrue(_wait_for(lambda: self.pipeline.stats()['hanging']['failed'] == 3))
+        threads = [t for t in threading.enumerate() if t.name.startswith('notify-hanging')]
+        self.assertEqual(len(threads), _HangingNotifier.concurrency)
+
+        _HangingNotifier.release.set()
+        self.assertTrue(_wait_for(lambda: self.delivered('hanging') == events - 3))
+
+    def test_latency_is_recorded(self):
+        sink = self.sink(delay=0.05)
+        self.pipeline.configure({'http': {'url': sink.url}})
+
+        for _ in range(3):
+            self.pipeline.notify('MATCHED', map='sandstorm', region='fra', server='1')
+        self.assertTrue(_wait_for(lambda: self.delivered('http') == 3))
+        stats = self.pipeline.stats()['http']
+        self.assertGreaterEqual(stats['avg_ms'], 50)
+        self.assertGreaterEqual(stats['p95_ms'], stats['avg_ms'])
+
+if __name__ == "__main__":
+    unittest.main()
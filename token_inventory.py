@@ -0,0 +1,235 @@
+import argparse
+import base64
+import glob
+import hashlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Claims that may hold the account id, in order of preference
+USER_ID_CLAIMS = ('sub', 'user_id', 'userId', 'uid', 'id')
+# Each worker gets about this many chunks: big enough to amortise the IPC per profile,
+# small enough that a slow disk region doesn't leave the other workers idle at the end
+CHUNKS_PER_WORKER = 4
+# Below this many profiles per worker the pool costs more than it saves
+MIN_PROFILES_PER_WORKER = 32
+
+def read_leveldb_token(path):
+    """Retrieves the token from a client's localStorage"""
+    try:
+        if not os.path.exists(path):
+            return None
+
+        for file in os.listdir(path):
+            if file.endswith(('.ldb', '.log')):
+                filepath = os.path.join(path, file)
+                try:
+                    with open(filepath, 'rb') as f:
+                        content = f.read()
+                        if b'__FRVR_auth_access_token' in content:
+                            start = content.find(b'eyJ')
+                            if start != -1:
+                                end = content.find(b'\x00', start)
+                                if end == -1:
+                                    end = start + 1000
+                                token = content[start:end].decode('utf-8', errors='ignore')
+                                token = token.split('\x00')[0].split('"')[0]
+                                if token.startswith('eyJ'):
+                                    return token
+                except:
+                    continue
+        return None
+    except Exception as e:
+        print(f"Error reading: {e}")
+        return None
+
+def jwt_claims(token):
+    """Decodes the (unverified) payload of a JWT, returns {} if it isn't one"""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return claims if isinstance(claims, dict) else {}
+    except Exception:
+        return {}
+
+def scan_profile(path):
+    """Worker: reads the token of one leveldb directory (runs in a pool process)"""
+    token = read_leveldb_token(path)
+    if not token:
+        return None
+    return {'path': path, 'token': token}
+
+def describe_token(result, now, show_token=False):
+    """Builds the JSON record of a found token (the token itself is only included on request)"""
+    token = result['token']
+    claims = jwt_claims(token)
+    exp = claims.get('exp')
+    record = {
+        'path': result['path'],
+        'token_id': hashlib.sha256(token.encode('utf-8')).hexdigest()[:16],
+        'user_id': next((claims[key] for key in USER_ID_CLAIMS if key in claims), None),
+        'exp': exp,
+        'expires': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(exp)) if isinstance(exp, (int, float)) else None,
+        'expired': isinstance(exp, (int, float)) and exp <= now,
+    }
+    if show_token:
+        record['token'] = token
+    return record
+
+def expand_paths(patterns):
+    """Expands paths/glob patterns into unique leveldb directories (keeps order)
+
+    Paths that don't exist, aren't directories or patterns matching nothing are reported on stderr.
+    """
+    seen = set()
+    paths = []
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            print(f"[INVENTORY] Warning: no match for {pattern}", file=sys.stderr)
+        for path in sorted(matches):
+            path = os.path.normpath(path)
+            if not os.path.isdir(path):
+                reason = "not a directory" if os.path.exists(path) else "not found"
+                print(f"[INVENTORY] Warning: skipping {path} ({reason})", file=sys.stderr)
+            elif path not in seen:
+                seen.add(path)
+                paths.append(path)
+    return paths
+
+def available_cpus():
+    """CPUs this process may run on (affinity/cgroup aware where the OS supports it)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def plan_workers(count, workers=None):
+    """Returns (workers, chunksize) for `count` paths
+
+    More processes than CPUs only adds scheduling and IPC, and small batches don't pay
+    for the pool start-up, so both cap the worker count.
+    """
+    workers = min(workers or available_cpus(), available_cpus(), max(1, count // MIN_PROFILES_PER_WORKER))
+    chunksize = max(1, -(-count // (workers * CHUNKS_PER_WORKER)))
+    return workers, chunksize
+
+def scan(paths, workers=None):
+    """Yields the scan result of every path, spread across a process pool"""
+    workers, chunksize = plan_workers(len(paths), workers)
+    if workers == 1:
+        yield from map(scan_profile, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(scan_profile, paths, chunksize=chunksize)
+
+def run_inventory(paths, out, workers=None, show_token=False):
+    """Streams one JSON line per unique token, returns (profiles, tokens, duplicates)"""
+    now = time.time()
+    seen = set()
+    found = duplicates = 0
+    for result in scan(paths, workers):
+        if result is None:
+            continue
+        if result['token'] in seen:
+            duplicates += 1
+            continue
+        seen.add(result['token'])
+        found += 1
+        out.write(json.dumps(describe_token(result, now, show_token)) + '\n')
+        out.flush()
+    return len(paths), found, duplicates
+
+def _fake_token(index):
+    header = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b'=')
+    claims = json.dumps({'sub': f"user-{index}", 'exp': int(time.time()) + random.randint(-86400, 86400 * 30)})
+    payload = base64.urlsafe_b64encode(claims.encode()).rstrip(b'=')
+    return header + b'.' + payload + b'.' + base64.urlsafe_b64encode(os.urandom(32)).rstrip(b'=')
+
+def build_corpus(root, profiles, duplicate_rate=0.1, file_size=16 * 1024):
+    """Creates a synthetic corpus of leveldb directories (some sharing the same token)"""
+    paths = []
+    tokens = []
+    for i in range(profiles):
+        path = os.path.join(root, f"profile-{i:05d}", 'Local Storage', 'leveldb')
+        os.makedirs(path)
+        if tokens and random.random() < duplicate_rate:
+            token = random.choice(tokens)
+        else:
+            token = _fake_token(i)
+            tokens.append(token)
+
+        for name in ('000003.ldb', '000005.ldb'):
+            with open(os.path.join(path, name), 'wb') as f:
+                f.write(os.urandom(file_size).replace(b'eyJ', b'xxx'))
+        with open(os.path.join(path, '000004.log'), 'wb') as f:
+            noise = os.urandom(file_size).replace(b'eyJ', b'xxx')
+            f.write(noise + b'_https://krunker.io\x00\x01__FRVR_auth_access_token\x01' + token + b'\x00' + noise)
+        paths.append(path)
+    return paths
+
+def benchmark(profiles, workers=None):
+    """Compares 1 process vs the pool on a synthetic corpus"""
+    requested = workers or available_cpus()
+    workers, chunksize = plan_workers(profiles, requested)
+    if workers < requested:
+        print(f"[BENCHMARK] Using {workers} worker(s) instead of {requested}: {available_cpus()} CPU(s) available, "
+              f"{MIN_PROFILES_PER_WORKER} profiles per worker minimum")
+    root = tempfile.mkdtemp(prefix='krunker_inventory_')
+    try:
+        print(f"[BENCHMARK] Building {profiles} synthetic profiles in {root}...")
+        paths = build_corpus(root, profiles)
+        with open(os.devnull, 'w') as devnull:
+            run_inventory(paths, devnull, workers=1)  # Warm up the page cache
+
+            results = {}
+            print(f"[BENCHMARK] Chunks of {chunksize} profiles")
+            for count in sorted({1, workers}):
+                started = time.perf_counter()
+                _, found, duplicates = run_inventory(paths, devnull, workers=count)
+                elapsed = time.perf_counter() - started
+                results[count] = elapsed
+                print(f"[BENCHMARK] {count:>2} worker(s): {elapsed:.2f}s, {profiles / elapsed:.0f} profiles/s "
+                      f"({found} tokens, {duplicates} duplicates)")
+
+        if workers in results and workers != 1:
+            print(f"[BENCHMARK] Speedup with {workers} workers: {results[1] / results[workers]:.2f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline inventory of Krunker tokens in leveldb directories (JSON lines)")
+    parser.add_argument('paths', nargs='*', help="leveldb directories or glob patterns (use ** for recursion)")
+    parser.add_argument('-f', '--file', help="file with one path/pattern per line ('-' for stdin)")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--show-token', action='store_true', help="include the raw token in the output")
+    parser.add_argument('--benchmark', type=int, metavar='PROFILES', help="benchmark on a synthetic corpus instead")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark(args.benchmark, args.workers)
+        return 0
+
+    patterns = list(args.paths)
+    if args.file:
+        f = sys.stdin if args.file == '-' else open(args.file, encoding='utf-8')
+        with f:
+            patterns.extend(line.strip() for line in f if line.strip())
+    if not patterns:
+        parser.error("no paths given")
+
+    paths = expand_paths(patterns)
+    started = time.perf_counter()
+    profiles, found, duplicates = run_inventory(paths, sys.stdout, args.workers, args.show_token)
+    print(f"[INVENTORY] {profiles} profiles scanned in {time.perf_counter() - started:.2f}s: "
+          f"{found} unique tokens, {duplicates} duplicates", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())